@@ -0,0 +1,226 @@
+# api_lecture.py
+
+# API de lecture asynchrone (aiosqlite) montée devant l'application Flask.
+# Les lectures très sollicitées les soirs de tirage (dernier tirage, classement,
+# fiche d'un participant) ne bloquent plus un worker par connexion, même pour
+# un client lent ou en long-polling. Les autres requêtes passent par Flask.
+
+import asyncio
+import json
+import pickle
+import time
+from urllib.parse import parse_qs
+
+import aiosqlite
+from asgiref.wsgi import WsgiToAsgi
+from sqlalchemy.engine import make_url
+
+
+ATTENTE_MAX = 30
+INTERVALLE_POLLING = 0.5
+INTERVALLE_PING = 15
+CLASSEMENT_MAX = 100
+
+
+def chemin_sqlite(uri):
+    url = make_url(uri)
+    if url.get_backend_name() != 'sqlite' or not url.database or url.database == ':memory:':
+        return None
+    return url.database
+
+
+# Paramètre de la query string converti avec type, ou defaut s'il est absent
+# ou invalide (comme request.args.get(..., type=int) côté Flask)
+def parametre(params, nom, defaut, type=int):
+    try:
+        return type(params[nom][0])
+    except (KeyError, IndexError, ValueError):
+        return defaut
+
+
+def participant_json(ligne):
+    nom, numeros, etoiles, gain, match_numeros, match_etoiles, numbers_proximity, stars_proximity = ligne
+    return {
+        'nom': nom,
+        'numeros': pickle.loads(numeros) if numeros else [],
+        'etoiles': pickle.loads(etoiles) if etoiles else [],
+        'gain': gain or 0.0,
+        'match_numeros': match_numeros or 0,
+        'match_etoiles': match_etoiles or 0,
+        'numbers_proximity': numbers_proximity or 0,
+        'stars_proximity': stars_proximity or 0,
+    }
+
+
+# Abonné au diffuseur du classement (diffusion.py) côté boucle asyncio : le
+# diffuseur publie depuis les threads Flask, on repasse donc par la boucle
+class AbonneAsync:
+    def __init__(self):
+        self.boucle = asyncio.get_running_loop()
+        self.file = asyncio.Queue()
+
+    def put_nowait(self, message):
+        self.boucle.call_soon_threadsafe(self.file.put_nowait, message)
+
+
+COLONNES_PARTICIPANT = ('nom, numeros, etoiles, gain, match_numeros, match_etoiles, '
+                        'numbers_proximity, stars_proximity')
+
+
+class LectureAPI:
+    def __init__(self, flask_app, chemin_db=None):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.chemin_db = chemin_db or chemin_sqlite(flask_app.config['SQLALCHEMY_DATABASE_URI'])
+        self._connexion = None
+        self._verrou = asyncio.Lock()
+
+    # Une seule connexion en lecture seule par worker : aiosqlite sérialise
+    # les requêtes sur son thread, qui durent bien moins d'une milliseconde
+    async def connexion(self):
+        async with self._verrou:
+            if self._connexion is None:
+                self._connexion = await aiosqlite.connect(f'file:{self.chemin_db}?mode=ro', uri=True)
+        return self._connexion
+
+    async def fermer(self):
+        if self._connexion is not None:
+            await self._connexion.close()
+            self._connexion = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+
+        if scope['type'] == 'http' and scope['method'] == 'GET' and scope['path'] == '/resultats/stream':
+            return await self.flux_resultats(receive, send)
+
+        if scope['type'] == 'http' and scope['method'] == 'GET' and self.chemin_db:
+            path = scope['path']
+            params = parse_qs(scope.get('query_string', b'').decode())
+
+            if path == '/api/tirage/dernier':
+                return await self.dernier_tirage(send, params)
+            if path == '/api/classement':
+                return await self.classement(send, params)
+            if path.startswith('/api/participants/'):
+                nom = path[len('/api/participants/'):]
+                if nom and '/' not in nom:
+                    return await self.participant(send, nom)
+
+        await self.wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.fermer()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def lire_dernier_tirage(self):
+        connexion = await self.connexion()
+        async with connexion.execute('SELECT id, numeros, etoiles FROM tirage ORDER BY id DESC LIMIT 1') as curseur:
+            ligne = await curseur.fetchone()
+        if ligne is None:
+            return None
+        return {'id': ligne[0], 'numeros': pickle.loads(ligne[1]), 'etoiles': pickle.loads(ligne[2])}
+
+    # Long-polling : avec ?apres=<id>, on attend (au plus ?attente= secondes)
+    # qu'un tirage plus récent que <id> soit publié
+    async def dernier_tirage(self, send, params):
+        apres = parametre(params, 'apres', 0)
+        attente = parametre(params, 'attente', 0.0, float)
+        # not >= : écarte aussi nan, qui ne serait jamais dépassé
+        attente = min(attente, ATTENTE_MAX) if attente >= 0 else 0.0
+        limite = time.monotonic() + attente
+
+        while True:
+            tirage = await self.lire_dernier_tirage()
+            if tirage is not None and tirage['id'] > apres:
+                return await envoyer_json(send, tirage)
+            if time.monotonic() >= limite:
+                break
+            await asyncio.sleep(INTERVALLE_POLLING)
+
+        if apres:
+            return await envoyer_json(send, None, statut=204)
+        return await envoyer_json(send, {'erreur': "Aucun tirage n'a encore été effectué."}, statut=404)
+
+    # Classement tel qu'enregistré lors du dernier calcul des gains
+    async def classement(self, send, params):
+        connexion = await self.connexion()
+        async with connexion.execute('SELECT max_gagnants FROM settings LIMIT 1') as curseur:
+            ligne = await curseur.fetchone()
+        n = parametre(params, 'n', 0) or (ligne[0] if ligne else 10)
+        n = max(1, min(n, CLASSEMENT_MAX))
+
+        async with connexion.execute(
+            f'SELECT {COLONNES_PARTICIPANT} FROM participant '
+            'ORDER BY match_numeros DESC, match_etoiles DESC, numbers_proximity, stars_proximity, id '
+            'LIMIT ?', (n,)
+        ) as curseur:
+            lignes = await curseur.fetchall()
+        return await envoyer_json(send, [participant_json(ligne) for ligne in lignes])
+
+    async def participant(self, send, nom):
+        connexion = await self.connexion()
+        async with connexion.execute(
+            f'SELECT {COLONNES_PARTICIPANT} FROM participant WHERE nom = ?', (nom,)
+        ) as curseur:
+            ligne = await curseur.fetchone()
+        if ligne is None:
+            return await envoyer_json(send, {'erreur': 'Participant introuvable.'}, statut=404)
+        return await envoyer_json(send, participant_json(ligne))
+
+
+    # Version asynchrone de /resultats/stream : une connexion SSE inactive ne
+    # coûte qu'une file asyncio, pas un thread
+    async def flux_resultats(self, receive, send):
+        diffuseur = self.flask_app.extensions['diffuseur']
+        abonne = AbonneAsync()
+        await asyncio.to_thread(diffuseur.abonner, abonne)
+
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [(b'content-type', b'text/event-stream; charset=utf-8'),
+                        (b'cache-control', b'no-cache'), (b'x-accel-buffering', b'no')],
+        })
+
+        async def deconnexion():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+
+        fin = asyncio.ensure_future(deconnexion())
+        try:
+            while not fin.done():
+                message = asyncio.ensure_future(abonne.file.get())
+                await asyncio.wait({message, fin}, timeout=INTERVALLE_PING, return_when=asyncio.FIRST_COMPLETED)
+                if not message.done():
+                    message.cancel()
+                    if not fin.done():
+                        await send({'type': 'http.response.body', 'body': b': ping\n\n', 'more_body': True})
+                    continue
+                if message.result() is None:
+                    break
+                await send({'type': 'http.response.body', 'body': message.result().encode(), 'more_body': True})
+        finally:
+            deconnecte = fin.done()
+            fin.cancel()
+            diffuseur.desabonner(abonne)
+
+        if not deconnecte:
+            await send({'type': 'http.response.body', 'body': b''})
+
+
+async def envoyer_json(send, donnees, statut=200):
+    corps = b'' if statut == 204 else json.dumps(donnees).encode()
+    await send({
+        'type': 'http.response.start',
+        'status': statut,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(corps)).encode())],
+    })
+    await send({'type': 'http.response.body', 'body': corps})
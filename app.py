@@ -1,9 +1,25 @@
 # app.py
 
-from flask import Flask, render_template, request, redirect, url_for, flash
-from models import db, Participant, Tirage, Settings, init_db
+from flask import Flask, Response, abort, render_template, request, redirect, url_for, flash, jsonify, send_from_directory
+from models import db, Participant, Tirage, Settings, Jeu, init_db
+from ticket_store import init_ticket_store, get_ticket_store, charger_gains
+from diffusion import Diffuseur, init_diffuseur, ligne_classement
+from coalesceur import init_coalesceur, InscriptionRefusee
+from routage import init_routage, utiliser_primaire
+from jeux import etat_du_jeu, init_jeux, jeu_courant, lire_jeu, lister_jeux, racine, selectionner_jeu
+from profilage import init_profilage
+from vues import cle_participants, cle_resultats, formater_montant, init_rendu, lignes_resultats
+from classement import IndexClassement, cle_classement, scorer
+from combinaison import code_ticket
+from bareme import Repartition, bareme_effectif, formater_bareme, parser_bareme, repartir_gains
+from statistiques import lire_statistiques, reconstruire_statistiques, reinitialiser_choix
+from snapshot import Snapshot, SnapshotError, ecrire_snapshot, regler_snapshot
+from sqlalchemy import func, select, update
+from markupsafe import Markup
+import click
+import csv
 import random
-import itertools
+import queue
 from config import Config
 
 def create_app(config_class=Config):
@@ -11,9 +27,16 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
     app.secret_key = app.config['SECRET_KEY']
+    init_rendu(app)
 
     print("Initialisation de la base de données")
     db.init_app(app)
+    # En premier : les requêtes profilées couvrent les autres hooks
+    init_profilage(app)
+    init_ticket_store(app)
+    init_diffuseur(app)
+    init_coalesceur(app)
+    init_jeux(app)
 
     with app.app_context():
         print("Initialisation de la base de données avec init_db")
@@ -22,18 +45,26 @@ def create_app(config_class=Config):
         # 👇 garanti qu'on a une ligne Settings
         ensure_default_settings()
 
+        # Lectures sur la réplique, si elle est configurée
+        init_routage(app)
+
         # Définition des filtres personnalisés
         register_filters(app)
 
         # Enregistrement des routes
         register_routes(app)
 
+        # Commandes « flask ... »
+        register_commands(app)
+
     return app
 
 def register_filters(app):
     # Filtre pour formater les gains avec le symbole €
     @app.template_filter('format_gain')
     def format_gain(gain):
+        if isinstance(gain, (int, float)):
+            return formater_montant(gain)
         try:
             if gain is None or gain == "":
                 return "0 €"
@@ -45,6 +76,8 @@ def register_filters(app):
     # Filtre pour formater les nombres sans le symbole €
     @app.template_filter('format_number')
     def format_number(number):
+        if isinstance(number, (int, float)):
+            return formater_montant(number, symbole='')
         try:
             if number is None or number == "":
                 return "0"
@@ -77,6 +110,7 @@ def register_routes(app):
         print("Accès à la route /")
         settings = Settings.query.first()
         if not settings:
+            utiliser_primaire()
             ensure_default_settings()
             settings = Settings.query.first()
         return render_template('index.html', settings=settings)
@@ -89,11 +123,37 @@ def register_routes(app):
         settings = Settings.query.first()
         return render_template('rules.html', settings=settings)
 
+    # Route pour lister et créer les jeux ; chaque jeu a ses réglages, ses
+    # participants et ses tirages dans son propre shard (jeux.py)
+    @app.route('/jeux', methods=['GET', 'POST'])
+    def jeux():
+        print("Accès à la route /jeux")
+        erreur = None
+
+        if request.method == 'POST':
+            nom = request.form.get('nom', '').strip()
+            if not nom:
+                erreur = "Veuillez entrer le nom du jeu."
+            elif Jeu.query.filter_by(nom=nom).first():
+                erreur = "Ce nom de jeu est déjà pris, veuillez en choisir un autre."
+            else:
+                jeu = Jeu(nom=nom)
+                db.session.add(jeu)
+                db.session.commit()
+
+                # Création du shard et de ses réglages par défaut
+                selectionner_jeu(jeu.id)
+                ensure_default_settings()
+                return redirect(f"{racine()}/jeux/{jeu.id}/settings")
+
+        return render_template('jeux.html', jeux=lister_jeux(), jeu_courant=jeu_courant(),
+                               racine=racine(), erreur=erreur)
+
     # Route pour effectuer un tirage
     @app.route('/tirage', methods=['GET', 'POST'])
     def tirage():
         print("Accès à la route /tirage")
-        participants = Participant.query.all()
+        participants = get_ticket_store()
 
         if len(participants) == 0:
             error = "Aucun participant disponible pour le tirage."
@@ -103,9 +163,10 @@ def register_routes(app):
             settings = Settings.query.first()
             numeros = random.sample(range(1, settings.max_numeros + 1), settings.selection_numeros)
             etoiles = random.sample(range(1, settings.max_etoiles + 1), settings.selection_etoiles)
-            nouveau_tirage = Tirage(numeros=numeros, etoiles=etoiles)
+            nouveau_tirage = Tirage(numeros=numeros, etoiles=etoiles, bareme=bareme_effectif(settings))
             db.session.add(nouveau_tirage)
             db.session.commit()
+            diffuseur_courant().signaler()
             return redirect(url_for('resultats'))
 
         return render_template('tirage.html')
@@ -120,9 +181,8 @@ def register_routes(app):
         nombre_disponible = settings.max_participants - participants_existants
 
         if nombre_disponible <= 0:
-            participants = Participant.query.all()
             erreur = f"Le nombre maximum de {settings.max_participants} participants a été atteint."
-            return render_template('inscription.html', participants=participants, erreur=erreur, settings=settings)
+            return page_inscription(settings, erreur=erreur)
 
         nombre_a_generer = min(nombre_demande, nombre_disponible)
         for i in range(nombre_a_generer):
@@ -133,6 +193,7 @@ def register_routes(app):
             db.session.add(participant)
 
         db.session.commit()
+        diffuseur_courant().signaler()
 
         return redirect(url_for('inscription', success=f"{nombre_a_generer} participants générés avec succès !"))
 
@@ -141,7 +202,10 @@ def register_routes(app):
     def supprimer_participants():
         print("Accès à la route /supprimer_participants")
         Participant.query.delete()
+        reinitialiser_choix()
+        invalider_reglement()
         db.session.commit()
+        diffuseur_courant().signaler()
 
         nom = request.form.get('nom', '')
         numeros = request.form.get('numeros', '')
@@ -153,16 +217,24 @@ def register_routes(app):
     @app.route('/participants', methods=['GET'])
     def participants_route():
         print("Accès à la route /participants")
-        participants = Participant.query.all()
+        participants = get_ticket_store().tickets(charger_gains())
         return render_template('participants.html', participants=participants)
 
     # Route pour afficher les résultats du dernier tirage
     @app.route('/resultats')
     def resultats():
         print("Accès à la route /resultats")
-        participants = Participant.query.all()
+        participants = get_ticket_store()
         tirage = Tirage.query.order_by(Tirage.id.desc()).first()
 
+        def deja_regle(tirage):
+            return tirage is not None and tirage.regle_nb == len(participants) and tirage.regle_max_id == participants.watermark
+
+        if not deja_regle(tirage):
+            # Réplique en retard ou gains à recalculer : base principale
+            utiliser_primaire()
+            tirage = Tirage.query.order_by(Tirage.id.desc()).populate_existing().first()
+
         if not participants:
             return redirect(url_for('tirage', error="Aucun participant trouvé pour les résultats."))
 
@@ -170,10 +242,275 @@ def register_routes(app):
             # Pas de tirage encore -> redirige vers la page de tirage
             return redirect(url_for('tirage', error="Aucun tirage n'a encore été effectué."))
 
-        sorted_participants = calculer_gains(participants, tirage)
+        # Gains déjà enregistrés pour ces tickets : lignes préparées au
+        # règlement, ou simple lecture (sur la réplique si elle est
+        # configurée) si le règlement a eu lieu dans un autre processus
+        if deja_regle(tirage):
+            settings = Settings.query.first()
+
+            def lire_classement():
+                return lignes_resultats(Participant.query.order_by(
+                    Participant.match_numeros.desc(),
+                    Participant.match_etoiles.desc(),
+                    Participant.numbers_proximity,
+                    Participant.stars_proximity,
+                    Participant.id
+                ).limit(settings.max_gagnants).all(), tirage)
+
+            lignes = participants.vue('resultats', cle_resultats(tirage, settings), lire_classement)
+            return render_template('resultats.html', lignes=lignes, tirage=tirage, settings=settings)
+
+        sorted_participants, lignes = calculer_gains(participants, tirage)
+        publier_classement(tirage, sorted_participants)
         settings = Settings.query.first()
-        return render_template('resultats.html', participants=sorted_participants, tirage=tirage, settings=settings)
+        return render_template('resultats.html', lignes=lignes, tirage=tirage, settings=settings)
+
+    # Flux Server-Sent Events du classement : le tirage et le top N dès que
+    # les gains sont calculés, puis les différences (nouveaux tickets, égalités).
+    # Cette vue immobilise un worker synchrone par abonné : elle ne sert qu'au
+    # serveur de développement et aux tests. En production (Procfile), le flux
+    # est servi en asynchrone par api_lecture.py avant d'atteindre Flask.
+    @app.route('/resultats/stream')
+    def resultats_stream():
+        print("Accès à la route /resultats/stream")
+        diffuseur = diffuseur_courant()
+        abonne = diffuseur.abonner()
+
+        def flux():
+            try:
+                while True:
+                    try:
+                        message = abonne.get(timeout=15)
+                    except queue.Empty:
+                        yield ": ping\n\n"
+                        continue
+                    if message is None:
+                        break
+                    yield message
+            finally:
+                diffuseur.desabonner(abonne)
+
+        return Response(flux(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    # Les gains enregistrés ne correspondent plus aux réglages ou aux tickets :
+    # le prochain affichage de /resultats les recalculera
+    def invalider_reglement():
+        db.session.execute(update(Tirage).values(regle_nb=None, regle_max_id=None))
+
+    # Publie le classement calculé auprès des abonnés du flux
+    def publier_classement(tirage, classement):
+        diffuseur_courant().publier(
+            {'id': tirage.id, 'numeros': tirage.numeros, 'etoiles': tirage.etoiles},
+            [ligne_classement(p) for p in classement]
+        )
+
+    # Classement provisoire du dernier tirage : le top N et les gains qu'il
+    # recevrait, calculés sur l'index du magasin (seuls les tickets inscrits
+    # depuis la dernière fois sont scorés). Rien n'est écrit en base : le
+    # règlement reste l'affaire de /resultats.
+    def diffuser_classement():
+        tirage = Tirage.query.order_by(Tirage.id.desc()).first()
+        if tirage is None:
+            return
+        settings = Settings.query.first()
+        bareme = tirage.bareme or bareme_effectif(settings)
+
+        premiers, taille, effectifs = get_ticket_store().premiers(tirage, settings.max_gagnants)
+        repartition = Repartition(bareme, taille, effectifs)
+        for ticket, rang, ex_aequo in premiers:
+            part = repartition.part(rang - 1, rang - 1 + ex_aequo, (ticket.match_numeros, ticket.match_etoiles))
+            ticket.gain = settings.jackpot_amount * part / 100
+        publier_classement(tirage, [ticket for ticket, _, _ in premiers])
+
+    # Appelée par le diffuseur hors de toute requête (thread du diffuseur, ou
+    # premier abonné) : contexte d'application propre, sur le shard du jeu
+    def preparer_diffusion(jeu_id=None):
+        with app.app_context():
+            selectionner_jeu(jeu_id)
+            diffuser_classement()
+
+    # Un diffuseur par jeu : chaque jeu a son propre classement
+    def nouveau_diffuseur(jeu_id):
+        diffuseur = Diffuseur(app.config['DIFFUSION_DELAI_MS'] / 1000)
+        diffuseur.preparer = lambda: preparer_diffusion(jeu_id)
+        return diffuseur
+
+    def diffuseur_courant():
+        return etat_du_jeu('diffuseur', nouveau_diffuseur)
+
+    app.extensions['diffuseur'].preparer = preparer_diffusion
+
+
+    # API JSON de lecture (version synchrone ; api_lecture.py sert les mêmes
+    # routes en asynchrone quand l'application tourne derrière asgi.py)
+    def participant_json(participant):
+        return {
+            'nom': participant.nom,
+            'numeros': participant.numeros or [],
+            'etoiles': participant.etoiles or [],
+            'gain': participant.gain or 0.0,
+            'match_numeros': participant.match_numeros or 0,
+            'match_etoiles': participant.match_etoiles or 0,
+            'numbers_proximity': participant.numbers_proximity or 0,
+            'stars_proximity': participant.stars_proximity or 0
+        }
+
+    # Pas de long-polling ici : ?attente= est ignoré et la réponse est
+    # immédiate, pour ne jamais immobiliser un worker synchrone. L'attente
+    # est servie par api_lecture.py (asgi.py, le point d'entrée du Procfile).
+    @app.route('/api/tirage/dernier')
+    def api_dernier_tirage():
+        apres = request.args.get('apres', 0, type=int)
+        tirage = Tirage.query.order_by(Tirage.id.desc()).first()
+        if tirage is not None and tirage.id > apres:
+            return jsonify({'id': tirage.id, 'numeros': tirage.numeros, 'etoiles': tirage.etoiles})
+
+        if apres:
+            return '', 204
+        return jsonify({'erreur': "Aucun tirage n'a encore été effectué."}), 404
+
+    # Gagnants du jackpot (grille complète) : recherche directe par le code
+    # canonique du tirage dans l'index de Participant.combinaison. Une grille
+    # trop grande pour tenir dans un code (None) n'est jamais cherchée par
+    # « combinaison IS NULL » : les tickets sans code sont comparés un à un
+    @app.route('/api/tirage/dernier/jackpot')
+    def api_jackpot():
+        tirage = Tirage.query.order_by(Tirage.id.desc()).first()
+        if tirage is None:
+            return jsonify({'erreur': "Aucun tirage n'a encore été effectué."}), 404
+        code = code_ticket(tirage.numeros, tirage.etoiles)
+        if code is not None:
+            noms = db.session.execute(
+                db.select(Participant.nom).where(Participant.combinaison == code).order_by(Participant.id)
+            ).scalars().all()
+        else:
+            grille = (sorted(tirage.numeros), sorted(tirage.etoiles))
+            candidats = db.session.execute(
+                db.select(Participant.nom, Participant.numeros, Participant.etoiles)
+                .where(Participant.combinaison.is_(None)).order_by(Participant.id)
+            )
+            noms = [nom for nom, numeros, etoiles in candidats
+                    if (sorted(numeros or []), sorted(etoiles or [])) == grille]
+        return jsonify({'tirage': tirage.id, 'gagnants': noms})
 
+    @app.route('/api/classement')
+    def api_classement():
+        settings = Settings.query.first()
+        n = request.args.get('n', settings.max_gagnants, type=int)
+        n = max(1, min(n, 100))
+        participants = Participant.query.order_by(
+            Participant.match_numeros.desc(),
+            Participant.match_etoiles.desc(),
+            Participant.numbers_proximity,
+            Participant.stars_proximity,
+            Participant.id
+        ).limit(n).all()
+        return jsonify([participant_json(p) for p in participants])
+
+    @app.route('/api/participants/<nom>')
+    def api_participant(nom):
+        participant = Participant.query.filter_by(nom=nom).first()
+        if participant is None:
+            return jsonify({'erreur': 'Participant introuvable.'}), 404
+        return jsonify(participant_json(participant))
+
+    # Résultat d'un seul ticket pour le dernier tirage, lu via l'index unique
+    # sur le nom, sans jamais scorer ni trier le pool dans la requête. Si les
+    # gains enregistrés sont à jour (marqueurs regle_*), le rang est un
+    # comptage sur ix_participant_classement ; sinon il vient de l'index de
+    # classement du magasin, tenu à jour en arrière-plan par le diffuseur.
+    @app.route('/api/participants/<nom>/result')
+    def api_resultat_participant(nom):
+        participant = Participant.query.filter_by(nom=nom).first()
+        if participant is None:
+            return jsonify({'erreur': 'Participant introuvable.'}), 404
+
+        tirage = Tirage.query.order_by(Tirage.id.desc()).first()
+        if tirage is None:
+            return jsonify({'erreur': "Aucun tirage n'a encore été effectué."}), 404
+
+        store = get_ticket_store()
+        if tirage.regle_nb == len(store) and tirage.regle_max_id == store.watermark:
+            score = (participant.match_numeros, participant.match_etoiles,
+                     participant.numbers_proximity, participant.stars_proximity)
+            rang, ex_aequo = compter_rang(score)
+            resultat = (rang, ex_aequo, len(store), True)
+        else:
+            score = scorer(participant.numeros, participant.etoiles, tirage.numeros, tirage.etoiles)
+            resultat = store.rang_courant(tirage, score)
+            if resultat is None:
+                diffuseur_courant().signaler()
+                reponse = jsonify({'erreur': "Classement en cours de calcul, réessayez dans un instant."})
+                return reponse, 503, {'Retry-After': '1'}
+
+        rang, ex_aequo, taille, regle = resultat
+        return jsonify({
+            'nom': participant.nom,
+            'numeros': participant.numeros,
+            'etoiles': participant.etoiles,
+            'tirage': {'id': tirage.id, 'numeros': tirage.numeros, 'etoiles': tirage.etoiles},
+            'match_numeros': score[0],
+            'match_etoiles': score[1],
+            'numbers_proximity': score[2],
+            'stars_proximity': score[3],
+            'rang': rang,
+            'ex_aequo': ex_aequo,
+            'meme_combinaison': Participant.query.filter(
+                Participant.combinaison == participant.combinaison,
+                Participant.id != participant.id
+            ).count() if participant.combinaison is not None else 0,
+            'participants': taille,
+            # Gain enregistré au dernier calcul ; « regle » est faux si des
+            # tickets ont été ajoutés depuis
+            'gain': participant.gain or 0.0,
+            'regle': regle
+        })
+
+    # Rang (1 + tickets strictement meilleurs) et ex aequo d'un score réglé,
+    # d'après les colonnes enregistrées : une plage de l'index composite par
+    # critère départagé, sans lire les tickets
+    def compter_rang(score):
+        colonnes = (Participant.match_numeros, Participant.match_etoiles,
+                    Participant.numbers_proximity, Participant.stars_proximity)
+        meilleurs = (colonnes[0] > score[0], colonnes[1] > score[1], colonnes[2] < score[2], colonnes[3] < score[3])
+        egaux = [colonne == valeur for colonne, valeur in zip(colonnes, score)]
+
+        def compter(*conditions):
+            return select(func.count()).select_from(Participant).where(*conditions).scalar_subquery()
+
+        mieux_classes = sum(compter(*egaux[:i], meilleurs[i]) for i in range(len(colonnes)))
+        return db.session.execute(select(mieux_classes + 1, compter(*egaux))).one()
+
+    # Route pour afficher les statistiques des tirages et des choix des joueurs
+    @app.route('/stats')
+    def stats():
+        print("Accès à la route /stats")
+        settings = Settings.query.first()
+        return render_template('stats.html', stats=lire_statistiques(settings), settings=settings)
+
+    @app.route('/api/stats')
+    def api_stats():
+        return jsonify(lire_statistiques(Settings.query.first()))
+
+    # Pages des profils capturés (profilage.py), réservées aux porteurs du
+    # jeton PROFILAGE_JETON (en-tête X-Profilage ou paramètre jeton)
+    def verifier_jeton_profilage():
+        profileur = app.extensions['profileur']
+        if not profileur.jeton_valide(request.headers.get('X-Profilage') or request.args.get('jeton')):
+            abort(404)
+        return profileur
+
+    @app.route('/profils')
+    def profils():
+        print("Accès à la route /profils")
+        profileur = verifier_jeton_profilage()
+        return render_template('profils.html', profils=profileur.plus_lents(), jeton=request.args.get('jeton'))
+
+    @app.route('/profils/<nom>')
+    def profil(nom):
+        profileur = verifier_jeton_profilage()
+        return send_from_directory(profileur.dossier, nom, mimetype='text/plain')
 
     # Route pour afficher et modifier les réglages du jeu
     @app.route('/settings', methods=['GET', 'POST'])
@@ -195,9 +532,13 @@ def register_routes(app):
             db.session.commit()
 
         if request.method == 'POST':
-            max_gagnants = int(request.form['max_gagnants'])
-            if max_gagnants > 10:
-                max_gagnants = 10
+            max_gagnants = max(1, int(request.form['max_gagnants']))
+
+            try:
+                bareme = parser_bareme(request.form.get('bareme', ''), max_gagnants) or None
+            except ValueError as e:
+                return render_template('settings.html', settings=settings, erreur=str(e),
+                                       bareme=request.form.get('bareme', ''))
 
             settings.max_participants = int(request.form['max_participants'])
             settings.jackpot_amount = float(request.form['jackpot_amount'])
@@ -206,12 +547,15 @@ def register_routes(app):
             settings.selection_numeros = int(request.form['selection_numeros'])
             settings.selection_etoiles = int(request.form['selection_etoiles'])
             settings.max_gagnants = max_gagnants
+            settings.bareme = bareme
+            invalider_reglement()
 
             db.session.commit()
             return redirect(url_for('settings', success="Les réglages ont été mis à jour avec succès !"))
 
         success = request.args.get('success')
-        return render_template('settings.html', settings=settings, success=success)
+        return render_template('settings.html', settings=settings, success=success,
+                               bareme=formater_bareme(settings.bareme))
 
     # Route pour réinitialiser les réglages aux valeurs par défaut
     @app.route('/reset_settings', methods=['POST'])
@@ -227,6 +571,8 @@ def register_routes(app):
             settings.selection_numeros = 5
             settings.selection_etoiles = 2
             settings.max_gagnants = 10
+            settings.bareme = None
+            invalider_reglement()
 
             db.session.commit()
 
@@ -264,121 +610,179 @@ def register_routes(app):
                     erreur = f"Veuillez sélectionner {settings.selection_etoiles} étoiles uniques entre 1 et {settings.max_etoiles}."
 
             if not erreur:
-                participant = Participant(nom=nom, numeros=numeros, etoiles=etoiles)
-                db.session.add(participant)
-                db.session.commit()
-
-                return redirect(url_for('inscription', success="Participant ajouté avec succès !"))
-
-        participants = Participant.query.all()
-
-        return render_template('inscription.html', participants=participants, success=success, erreur=erreur, nom=nom, numeros=numeros, etoiles=etoiles, settings=settings)
+                coalesceur = app.extensions['coalesceur']
+                if coalesceur is not None:
+                    # Rend la connexion au pool pendant l'attente du lot
+                    db.session.close()
+                    try:
+                        coalesceur.soumettre(nom, numeros, etoiles, jeu_courant())
+                    except InscriptionRefusee as e:
+                        erreur = str(e)
+                else:
+                    participant = Participant(nom=nom, numeros=numeros, etoiles=etoiles)
+                    db.session.add(participant)
+                    db.session.commit()
 
-    # Fonction pour calculer la proximité des numéros entre le participant et le tirage
-    def calculate_numbers_proximity(numeros_participant, numeros_tirage):
-        matched_numbers = set(numeros_participant).intersection(numeros_tirage)
-        unmatched_drawn_numbers = list(set(numeros_tirage).difference(matched_numbers))
-        unmatched_participant_numbers = list(set(numeros_participant).difference(matched_numbers))
-
-        if not unmatched_drawn_numbers or not unmatched_participant_numbers:
-            return 0
-
-        permutations = itertools.permutations(unmatched_participant_numbers)
-
-        min_total_proximity = None
-        for perm in permutations:
-            total_proximity = sum(abs(num_draw - num_part) for num_draw, num_part in zip(unmatched_drawn_numbers, perm))
-            if min_total_proximity is None or total_proximity < min_total_proximity:
-                min_total_proximity = total_proximity
-
-        return min_total_proximity
+            if not erreur:
+                diffuseur_courant().signaler()
 
-    # Fonction pour calculer la proximité des étoiles entre le participant et le tirage
-    def calculate_stars_proximity(etoiles_participant, etoiles_tirage):
-        matched_stars = set(etoiles_participant).intersection(etoiles_tirage)
-        unmatched_drawn_stars = list(set(etoiles_tirage).difference(matched_stars))
-        unmatched_participant_stars = list(set(etoiles_participant).difference(matched_stars))
+                return redirect(url_for('inscription', success="Participant ajouté avec succès !"))
 
-        if not unmatched_drawn_stars or not unmatched_participant_stars:
-            return 0
+        return page_inscription(settings, success=success, erreur=erreur, nom=nom, numeros=numeros, etoiles=etoiles)
 
-        permutations = itertools.permutations(unmatched_participant_stars)
+    # Page d'inscription ; le tableau des participants n'est rendu à nouveau
+    # que si les tickets ou les gains ont changé depuis le dernier affichage
+    def page_inscription(settings, **contexte):
+        store = get_ticket_store()
+        tirage = Tirage.query.order_by(Tirage.id.desc()).first()
 
-        min_total_proximity = None
-        for perm in permutations:
-            total_proximity = sum(abs(star_draw - star_part) for star_draw, star_part in zip(unmatched_drawn_stars, perm))
-            if min_total_proximity is None or total_proximity < min_total_proximity:
-                min_total_proximity = total_proximity
+        def rendre_tableau():
+            return Markup(render_template('tableau_participants.html', participants=store.tickets(charger_gains())))
 
-        return min_total_proximity
+        tableau = store.vue('inscription', cle_participants(store, tirage, settings), rendre_tableau)
+        return render_template('inscription.html', tableau_participants=tableau, nombre_participants=len(store),
+                               settings=settings, **contexte)
 
     # Fonction pour calculer les gains des participants en fonction du tirage
-    def calculer_gains(participants, tirage):
+    # Le classement se fait sur un instantané du magasin de tickets, pris sous
+    # son verrou : les tickets scorés, les ids mis à jour et les marqueurs
+    # regle_* correspondent toujours au même état, même si un autre thread
+    # recharge le magasin entre-temps. Seuls les gagnants affichés sont
+    # matérialisés en objets Ticket. Renvoie ce classement et ses lignes de
+    # /resultats.
+    def calculer_gains(store, tirage):
         settings = Settings.query.first()
-        total_gains = settings.jackpot_amount
-        max_gagnants = min(settings.max_gagnants, 10)
-
-        pourcentages_fixes = [40, 20, 12, 7, 6, 5, 4, 3, 2, 1]
-
-        for participant in participants:
-            participant.match_numeros = len(set(participant.numeros).intersection(tirage.numeros))
-            participant.match_etoiles = len(set(participant.etoiles).intersection(tirage.etoiles))
-            participant.numbers_proximity = calculate_numbers_proximity(participant.numeros, tirage.numeros)
-            participant.stars_proximity = calculate_stars_proximity(participant.etoiles, tirage.etoiles)
-
-        sorted_participants = sorted(
-            participants,
-            key=lambda p: (
-                -p.match_numeros,
-                -p.match_etoiles,
-                p.numbers_proximity,
-                p.stars_proximity
-            )
-        )
+        # Barème figé au moment du tirage (barème des réglages pour les anciens tirages)
+        bareme = tirage.bareme or bareme_effectif(settings)
+
+        tickets = store.instantane()
+        scores = tickets.scores(tirage)
+        ordre = sorted(range(len(scores)), key=lambda i: cle_classement(scores[i]))
+        gains = repartir_gains(scores, ordre, bareme, settings.jackpot_amount)
+
+        # Mise à jour groupée par clé primaire, sans réhydrater les objets ORM
+        if scores:
+            db.session.execute(update(Participant), [
+                {
+                    'id': tickets.ids[i],
+                    'gain': gains[i],
+                    'match_numeros': score[0],
+                    'match_etoiles': score[1],
+                    'numbers_proximity': score[2],
+                    'stars_proximity': score[3]
+                }
+                for i, score in enumerate(scores)
+            ])
+        tirage.regle_nb = len(tickets)
+        tirage.regle_max_id = tickets.watermark
+
+        classement = [tickets.ticket(i, gains[i], scores[i]) for i in ordre[:settings.max_gagnants]]
+        # Lignes de /resultats préparées une fois pour toutes, avant que le
+        # commit n'expire le tirage et les réglages
+        vue = (cle_resultats(tirage, settings), lignes_resultats(classement, tirage))
+        index = IndexClassement(tirage.id, scores, regle=True, nb_premiers=settings.max_gagnants)
 
-        nb_gagnants = min(len(sorted_participants), max_gagnants)
-        pourcentages = pourcentages_fixes[:nb_gagnants]
-
-        if nb_gagnants < 10:
-            somme_pourcentages = sum(pourcentages)
-            pourcentages_normalises = [(p / somme_pourcentages) * 100 for p in pourcentages]
+        db.session.commit()
+        store.adopter(tickets, index, {'resultats': vue})
+        return classement, vue[1]
+
+def register_commands(app):
+    # --jeu : la commande porte sur le shard de ce jeu (jeux.py) au lieu du
+    # jeu par défaut
+    option_jeu = click.option('--jeu', 'jeu_id', type=int, help="Jeu concerné (par défaut le jeu principal).")
+
+    def choisir_jeu(jeu_id):
+        if jeu_id is None:
+            return
+        if lire_jeu(jeu_id) is None:
+            raise click.ClickException(f"Jeu {jeu_id} introuvable.")
+        selectionner_jeu(jeu_id)
+
+    # Exporte tous les tickets dans un snapshot binaire (voir snapshot.py),
+    # avec le tirage (par défaut le dernier), son barème et la cagnotte
+    @app.cli.command('export-snapshot')
+    @click.argument('chemin', type=click.Path(dir_okay=False))
+    @click.option('--tirage', 'tirage_id', type=int, help="Tirage à embarquer (par défaut le dernier).")
+    @option_jeu
+    def export_snapshot(chemin, tirage_id, jeu_id):
+        choisir_jeu(jeu_id)
+        settings = Settings.query.first()
+        if tirage_id is not None:
+            tirage = db.session.get(Tirage, tirage_id)
+            if tirage is None:
+                raise click.ClickException(f"Tirage {tirage_id} introuvable.")
         else:
-            pourcentages_normalises = pourcentages
-
-        position = 0
-        while position < nb_gagnants:
-            same_rank_participants = [sorted_participants[position]]
-            current_match = (
-                sorted_participants[position].match_numeros,
-                sorted_participants[position].match_etoiles,
-                sorted_participants[position].numbers_proximity,
-                sorted_participants[position].stars_proximity
-            )
-
-            while (position + 1 < nb_gagnants and
-                   (sorted_participants[position + 1].match_numeros,
-                    sorted_participants[position + 1].match_etoiles,
-                    sorted_participants[position + 1].numbers_proximity,
-                    sorted_participants[position + 1].stars_proximity) == current_match):
-                same_rank_participants.append(sorted_participants[position + 1])
-                position += 1
-
-            start_rank = position - len(same_rank_participants) + 1
-            end_rank = position + 1
-
-            total_pourcentage = sum(pourcentages_normalises[start_rank:end_rank])
-            gain_par_participant = (total_gains * (total_pourcentage / 100)) / len(same_rank_participants)
-
-            for p in same_rank_participants:
-                p.gain = gain_par_participant
-            position += 1
+            tirage = Tirage.query.order_by(Tirage.id.desc()).first()
+
+        store = get_ticket_store()
+        meta = {
+            'tirage': {'id': tirage.id, 'numeros': tirage.numeros, 'etoiles': tirage.etoiles} if tirage else None,
+            'bareme': (tirage.bareme if tirage else None) or bareme_effectif(settings),
+            'jackpot': settings.jackpot_amount
+        }
+        with open(chemin, 'wb') as fichier:
+            ecrire_snapshot(fichier, store, meta)
+        click.echo(f"{len(store)} tickets exportés dans {chemin}.")
+
+    # Compile tous les templates pour remplir le cache de bytecode
+    # (JINJA_CACHE_DOSSIER) avant le démarrage des workers
+    @app.cli.command('compile-templates')
+    def compile_templates():
+        noms = app.jinja_env.list_templates(extensions=['html'])
+        for nom in noms:
+            app.jinja_env.get_template(nom)
+        click.echo(f"{len(noms)} templates compilés dans {app.config.get('JINJA_CACHE_DOSSIER') or 'la mémoire (cache disque désactivé)'}.")
+
+    # Recalcule tous les compteurs de statistiques depuis les tirages et tickets
+    @app.cli.command('rebuild-stats')
+    @option_jeu
+    def rebuild_stats(jeu_id):
+        choisir_jeu(jeu_id)
+        nombre = reconstruire_statistiques()
+        click.echo(f"{nombre} compteurs de statistiques reconstruits.")
+
+    # Règle un snapshot sans toucher aux tickets de la base : avec le tirage
+    # embarqué, ou un tirage historique (--tirage) pour rejouer un règlement
+    @app.cli.command('settle-snapshot')
+    @click.argument('chemin', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--tirage', 'tirage_id', type=int, help="Rejoue le règlement avec ce tirage de la base.")
+    @click.option('--sortie', type=click.File('w'), default='-', help="Fichier CSV des résultats (sortie standard par défaut).")
+    @click.option('--tous', is_flag=True, help="Inclut aussi les tickets non gagnants.")
+    @option_jeu
+    def settle_snapshot(chemin, tirage_id, sortie, tous, jeu_id):
+        # Le jeu n'intervient que pour lire le tirage rejoué (--tirage)
+        choisir_jeu(jeu_id)
+        try:
+            snapshot = Snapshot(chemin)
+        except SnapshotError as e:
+            raise click.ClickException(str(e))
+
+        with snapshot:
+            bareme = snapshot.meta['bareme']
+            if tirage_id is not None:
+                tirage = db.session.get(Tirage, tirage_id)
+                if tirage is None:
+                    raise click.ClickException(f"Tirage {tirage_id} introuvable.")
+                numeros, etoiles = tirage.numeros, tirage.etoiles
+                bareme = tirage.bareme or bareme
+            elif snapshot.meta['tirage']:
+                numeros, etoiles = snapshot.meta['tirage']['numeros'], snapshot.meta['tirage']['etoiles']
+            else:
+                raise click.ClickException("Aucun tirage dans le snapshot : utilisez --tirage.")
 
-        for p in sorted_participants[nb_gagnants:]:
-            p.gain = 0
+            scores, ordre, gains = regler_snapshot(snapshot, numeros, etoiles, bareme, snapshot.meta['jackpot'])
 
-        db.session.commit()
+            ecrivain = csv.writer(sortie)
+            ecrivain.writerow(['id', 'rang', 'match_numeros', 'match_etoiles', 'numbers_proximity', 'stars_proximity', 'gain'])
+            rang = 0
+            for position, i in enumerate(ordre):
+                if position == 0 or scores[i] != scores[ordre[position - 1]]:
+                    rang = position + 1
+                if tous or gains[i]:
+                    ecrivain.writerow([snapshot.ids[i], rang, *scores[i], f"{gains[i]:.2f}"])
 
-        return sorted_participants
+            gagnants = sum(1 for g in gains if g)
+            click.echo(f"{len(snapshot)} tickets réglés, {gagnants} gagnants, {sum(gains):.2f} € distribués.", err=True)
 
 if __name__ == '__main__':
     print("Démarrage de l'application Flask")
@@ -0,0 +1,12 @@
+# asgi.py
+
+# Point d'entrée ASGI : API de lecture asynchrone + application Flask.
+#
+#   gunicorn asgi:application -k uvicorn.workers.UvicornWorker
+#
+# Comparaison avec les workers synchrones : benchmarks/bench_lecture.py
+
+from api_lecture import LectureAPI
+from app import create_app
+
+application = LectureAPI(create_app())
@@ -0,0 +1,161 @@
+# bareme.py
+
+import math
+from collections import Counter
+from itertools import accumulate
+
+POURCENTAGES_FIXES = [40, 20, 12, 7, 6, 5, 4, 3, 2, 1]
+
+# Part de la cagnotte réservée aux rangs au-delà du 10e dans le barème par défaut
+PART_RANGS_SUPPLEMENTAIRES = 10
+
+
+# Un barème est une liste de paliers :
+#   {'debut': 2, 'fin': 10, 'pourcentage': 30}  -> les rangs 2 à 10 se partagent 30 %
+#   {'classe': (5, 2), 'pourcentage': 10}       -> les tickets à 5 numéros + 2 étoiles se partagent 10 %
+# Un ticket cumule sa part de rang et sa part de classe.
+
+# Barème historique : les pourcentages fixes des max_gagnants premiers rangs,
+# ramenés à 100 %. Au-delà de 10 gagnants, les rangs 11 et suivants se
+# partagent PART_RANGS_SUPPLEMENTAIRES %.
+def bareme_par_defaut(max_gagnants):
+    max_gagnants = max(1, max_gagnants)
+    pourcentages = POURCENTAGES_FIXES[:max_gagnants]
+    total = 100 if max_gagnants <= len(POURCENTAGES_FIXES) else 100 - PART_RANGS_SUPPLEMENTAIRES
+    somme = sum(pourcentages)
+
+    bareme = [
+        {'debut': rang, 'fin': rang, 'pourcentage': p * total / somme}
+        for rang, p in enumerate(pourcentages, start=1)
+    ]
+    if max_gagnants > len(POURCENTAGES_FIXES):
+        bareme.append({'debut': len(POURCENTAGES_FIXES) + 1, 'fin': max_gagnants,
+                       'pourcentage': PART_RANGS_SUPPLEMENTAIRES})
+    return bareme
+
+
+def bareme_effectif(settings):
+    return settings.bareme or bareme_par_defaut(settings.max_gagnants)
+
+
+# Lecture du format texte du formulaire des réglages, un palier par ligne :
+#   1: 40        rang 1
+#   2-10: 30     rangs 2 à 10
+#   5+2: 10      classe 5 numéros + 2 étoiles
+# Les rangs payés ne dépassent pas max_gagnants : /resultats n'affiche que
+# les max_gagnants premiers, un rang payé au-delà serait invisible.
+def parser_bareme(texte, max_gagnants=None):
+    bareme = []
+    for numero_ligne, ligne in enumerate(texte.splitlines(), start=1):
+        ligne = ligne.strip()
+        if not ligne or ligne.startswith('#'):
+            continue
+        try:
+            cle, pourcentage = ligne.split(':')
+            pourcentage = float(pourcentage.replace('%', ''))
+            cle = cle.strip()
+            if '+' in cle:
+                numeros, etoiles = cle.split('+')
+                palier = {'classe': (int(numeros), int(etoiles)), 'pourcentage': pourcentage}
+            else:
+                debut, _, fin = cle.partition('-')
+                palier = {'debut': int(debut), 'fin': int(fin or debut), 'pourcentage': pourcentage}
+        except ValueError:
+            raise ValueError(f"Barème, ligne {numero_ligne} : format attendu « 1: 40 », « 2-10: 30 » ou « 5+2: 10 ».")
+
+        if not math.isfinite(pourcentage) or pourcentage <= 0 or ('debut' in palier and not 1 <= palier['debut'] <= palier['fin']):
+            raise ValueError(f"Barème, ligne {numero_ligne} : palier invalide.")
+        if 'fin' in palier and max_gagnants is not None and palier['fin'] > max_gagnants:
+            raise ValueError(f"Barème, ligne {numero_ligne} : le rang {palier['fin']} dépasse "
+                             f"le nombre maximum de gagnants ({max_gagnants}).")
+        bareme.append(palier)
+
+    rangs = sorted((p['debut'], p['fin']) for p in bareme if 'debut' in p)
+    if any(debut <= fin_precedente for (_, fin_precedente), (debut, _) in zip(rangs, rangs[1:])):
+        raise ValueError("Barème : les plages de rangs se chevauchent.")
+    if sum(p['pourcentage'] for p in bareme) > 100:
+        raise ValueError("Barème : le total des pourcentages dépasse 100 %.")
+    return bareme
+
+
+def formater_bareme(bareme):
+    lignes = []
+    for palier in bareme or []:
+        pourcentage = f"{palier['pourcentage']:g}"
+        if 'classe' in palier:
+            lignes.append(f"{palier['classe'][0]}+{palier['classe'][1]}: {pourcentage}")
+        elif palier['debut'] == palier['fin']:
+            lignes.append(f"{palier['debut']}: {pourcentage}")
+        else:
+            lignes.append(f"{palier['debut']}-{palier['fin']}: {pourcentage}")
+    return '\n'.join(lignes)
+
+
+# Pourcentage par rang pour un pool de nb_tickets tickets. S'il y a moins de
+# tickets que de rangs payés, les pourcentages des rangs occupés sont
+# renormalisés pour distribuer la totalité de la part « rangs ».
+def pourcentages_par_rang(bareme, nb_tickets):
+    paliers = [p for p in bareme if 'debut' in p]
+    if not paliers:
+        return []
+
+    par_rang = [0.0] * max(p['fin'] for p in paliers)
+    for palier in paliers:
+        part = palier['pourcentage'] / (palier['fin'] - palier['debut'] + 1)
+        for rang in range(palier['debut'] - 1, palier['fin']):
+            par_rang[rang] = part
+
+    if nb_tickets < len(par_rang):
+        total = sum(par_rang)
+        par_rang = par_rang[:nb_tickets]
+        somme = sum(par_rang)
+        if somme:
+            par_rang = [p * total / somme for p in par_rang]
+    return par_rang
+
+
+# Part (en %) revenant à chaque ticket d'un groupe d'ex aequo occupant les
+# positions debut à fin - 1 du classement : la somme des parts des rangs
+# occupés (sommes préfixées, O(1) par groupe), partagée à parts égales, plus
+# la part de sa classe. effectifs : nombre de tickets de chaque classe
+# (numéros, étoiles trouvés) dans le pool.
+class Repartition:
+    def __init__(self, bareme, nb_tickets, effectifs):
+        self.prefixes = [0.0, *accumulate(pourcentages_par_rang(bareme, nb_tickets))]
+        self.nb_rangs = len(self.prefixes) - 1
+        self.classes = {tuple(p['classe']): p['pourcentage'] for p in bareme if 'classe' in p}
+        self.effectifs = effectifs
+
+    def part(self, debut, fin, classe):
+        part = (self.prefixes[min(fin, self.nb_rangs)] - self.prefixes[min(debut, self.nb_rangs)]) / (fin - debut)
+        if classe in self.classes:
+            part += self.classes[classe] / self.effectifs[classe]
+        return part
+
+
+# Gains de chaque ticket en un seul passage sur l'ordre de classement : chaque
+# groupe d'ex aequo reçoit sa part (Repartition), plus sa part de classe.
+def repartir_gains(scores, ordre, bareme, jackpot):
+    gains = [0.0] * len(scores)
+    avec_classes = any('classe' in p for p in bareme)
+    effectifs = Counter((s[0], s[1]) for s in scores) if avec_classes else {}
+    repartition = Repartition(bareme, len(ordre), effectifs)
+
+    debut = 0
+    while debut < len(ordre):
+        if debut >= repartition.nb_rangs and not avec_classes:
+            break
+
+        score = scores[ordre[debut]]
+        fin = debut + 1
+        while fin < len(ordre) and scores[ordre[fin]] == score:
+            fin += 1
+
+        part = repartition.part(debut, fin, (score[0], score[1]))
+        if part:
+            montant = jackpot * part / 100
+            for position in range(debut, fin):
+                gains[ordre[position]] = montant
+        debut = fin
+
+    return gains
@@ -0,0 +1,71 @@
+# benchmarks/bench_inscriptions.py
+
+# Débit d'inscriptions concurrentes sur une base SQLite fichier, avec et sans
+# regroupement des commits (GROUP_COMMIT). Les requêtes passent par la pile
+# Flask complète (validation, insertion, statistiques), une par thread.
+#
+#   python benchmarks/bench_inscriptions.py --threads 12 --inscriptions 2000
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app import create_app
+from config import Config
+from models import db, Settings
+
+
+def mesurer(group_commit, nb_threads, nb_inscriptions):
+    with tempfile.TemporaryDirectory() as dossier:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(dossier, 'bench.db')}"
+            GROUP_COMMIT = group_commit
+
+        app = create_app(config_class=BenchConfig)
+        with app.app_context():
+            Settings.query.first().max_participants = nb_inscriptions
+            db.session.commit()
+
+        compteur = iter(range(nb_inscriptions))
+        verrou = threading.Lock()
+
+        def travailleur():
+            client = app.test_client()
+            while True:
+                with verrou:
+                    i = next(compteur, None)
+                if i is None:
+                    return
+                client.post('/inscription', data={
+                    'nom': f'Joueur_{i}',
+                    'numeros': [str(n) for n in range(1 + i % 40, 6 + i % 40)],
+                    'etoiles': ['1', '2']
+                })
+
+        threads = [threading.Thread(target=travailleur) for _ in range(nb_threads)]
+        debut = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duree = time.perf_counter() - debut
+
+        with app.app_context():
+            db.engine.dispose()
+        return nb_inscriptions / duree
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=12)
+    parser.add_argument('--inscriptions', type=int, default=2000)
+    args = parser.parse_args()
+
+    for group_commit in (False, True):
+        debit = mesurer(group_commit, args.threads, args.inscriptions)
+        print(f"GROUP_COMMIT={'1' if group_commit else '0'} : {debit:.0f} inscriptions/s")
@@ -0,0 +1,74 @@
+# benchmarks/bench_lecture.py
+
+# Compare les workers synchrones et l'API de lecture asynchrone sous forte
+# concurrence. Lancer le serveur à mesurer, puis ce script :
+#
+#   gunicorn 'app:create_app()' -w 4 -b 127.0.0.1:8000
+#   gunicorn asgi:application -k uvicorn.workers.UvicornWorker -w 4 -b 127.0.0.1:8001
+#
+#   python benchmarks/bench_lecture.py --port 8000 --inactifs 50
+#   python benchmarks/bench_lecture.py --port 8001 --inactifs 50
+#
+# Les connexions « inactives » simulent des clients en long-polling sur le
+# prochain tirage ; on mesure ensuite le débit et la latence de /api/classement.
+
+import argparse
+import asyncio
+import statistics
+import time
+
+
+async def requete(hote, port, chemin):
+    lecteur, ecrivain = await asyncio.open_connection(hote, port)
+    ecrivain.write(f'GET {chemin} HTTP/1.1\r\nHost: {hote}\r\nConnection: close\r\n\r\n'.encode())
+    await ecrivain.drain()
+    reponse = await lecteur.read()
+    ecrivain.close()
+    return int(reponse.split(b' ', 2)[1])
+
+
+async def client(hote, port, chemin, fin, latences, erreurs):
+    while time.monotonic() < fin:
+        debut = time.monotonic()
+        try:
+            statut = await requete(hote, port, chemin)
+        except OSError:
+            statut = None
+        if statut != 200:
+            erreurs.append(statut)
+        latences.append(time.monotonic() - debut)
+
+
+async def main(args):
+    inactifs = [
+        asyncio.create_task(requete(args.hote, args.port, f'/api/tirage/dernier?apres={2**31}&attente=30'))
+        for _ in range(args.inactifs)
+    ]
+    await asyncio.sleep(0.5)
+
+    latences, erreurs = [], []
+    fin = time.monotonic() + args.duree
+    await asyncio.gather(*(
+        client(args.hote, args.port, args.chemin, fin, latences, erreurs)
+        for _ in range(args.concurrence)
+    ))
+
+    for tache in inactifs:
+        tache.cancel()
+
+    latences.sort()
+    print(f'{len(latences)} requêtes en {args.duree}s : {len(latences) / args.duree:.0f} req/s, {len(erreurs)} erreurs')
+    if latences:
+        print(f'latence médiane {statistics.median(latences) * 1000:.1f} ms, '
+              f'p99 {latences[int(len(latences) * 0.99) - 1] * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--hote', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--chemin', default='/api/classement')
+    parser.add_argument('--concurrence', type=int, default=20)
+    parser.add_argument('--inactifs', type=int, default=0)
+    parser.add_argument('--duree', type=float, default=10)
+    asyncio.run(main(parser.parse_args()))
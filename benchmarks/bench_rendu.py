@@ -0,0 +1,114 @@
+# benchmarks/bench_rendu.py
+
+# Temps de rendu du classement de /resultats à 10 000 lignes : l'ancienne
+# boucle du template (test d'appartenance au tirage et filtre format_gain par
+# cellule) contre les lignes préparées au règlement (vues.py). Mesure aussi
+# le chargement à froid des templates, avec et sans cache de bytecode.
+#
+#   python benchmarks/bench_rendu.py --lignes 10000
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+from app import create_app
+from config import TestConfig
+from models import Settings, Tirage
+from ticket_store import Ticket
+from vues import lignes_resultats
+
+# Boucle de resultats.html avant les lignes préparées
+ANCIENNE_BOUCLE = """
+{% for participant in participants[:settings.max_gagnants] %}
+<tr>
+    <td data-label="Position">{{ loop.index }}</td>
+    <td data-label="Nom">{{ participant.nom }}</td>
+    <td data-label="Numéros">
+        {% for numero in participant.numeros %}
+            <span class="{% if numero in tirage.numeros %}correct-number{% endif %}">
+                {{ numero }}
+            </span>{% if not loop.last %}, {% endif %}
+        {% endfor %}
+    </td>
+    <td data-label="Étoiles">
+        {% for etoile in participant.etoiles %}
+            <span class="{% if etoile in tirage.etoiles %}correct-star{% endif %}">
+                {{ etoile }}
+            </span>{% if not loop.last %}, {% endif %}
+        {% endfor %}
+    </td>
+    <td data-label="Correspondances Numéros">{{ participant.match_numeros }}</td>
+    <td data-label="Correspondances Étoiles">{{ participant.match_etoiles }}</td>
+    <td data-label="Proximité Numéros" class="proximity-column">{{ participant.numbers_proximity }}</td>
+    <td data-label="Proximité Étoiles" class="proximity-column">{{ participant.stars_proximity }}</td>
+    <td data-label="Gain">{{ participant.gain | format_gain }}</td>
+</tr>
+{% endfor %}
+"""
+
+
+def chronometrer(fonction, repetitions):
+    meilleur = float('inf')
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction()
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    return meilleur * 1000
+
+
+def chargement_a_froid(dossier_templates, filtres, cache):
+    env = Environment(loader=FileSystemLoader(dossier_templates), bytecode_cache=cache)
+    env.filters.update(filtres)
+    for nom in env.list_templates(extensions=['html']):
+        env.get_template(nom)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lignes', type=int, default=10000)
+    parser.add_argument('--repetitions', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app(config_class=TestConfig)
+    tirage = Tirage(id=1, numeros=random.sample(range(1, 50), 5), etoiles=random.sample(range(1, 10), 2))
+    settings = Settings(jackpot_amount=3000000, max_gagnants=args.lignes)
+    participants = [
+        Ticket(i, f'Joueur_{i}', sorted(random.sample(range(1, 50), 5)), sorted(random.sample(range(1, 10), 2)),
+               random.choice([0.0, 12.5, 300.0, 1234.56]), random.randint(0, 5), random.randint(0, 2))
+        for i in range(args.lignes)
+    ]
+
+    with app.test_request_context('/resultats'):
+        ancienne = app.jinja_env.from_string(ANCIENNE_BOUCLE)
+        nouvelle = app.jinja_env.get_template('resultats.html')
+        lignes = lignes_resultats(participants, tirage)
+
+        temps_ancien = chronometrer(
+            lambda: ancienne.render(participants=participants, tirage=tirage, settings=settings), args.repetitions)
+        temps_preparation = chronometrer(lambda: lignes_resultats(participants, tirage), args.repetitions)
+        temps_nouveau = chronometrer(
+            lambda: nouvelle.render(lignes=lignes, tirage=tirage, settings=settings), args.repetitions)
+
+    print(f"{args.lignes} lignes")
+    print(f"  ancienne boucle (filtres, appartenance)   : {temps_ancien:.1f} ms")
+    print(f"  page complète sur lignes préparées         : {temps_nouveau:.1f} ms")
+    print(f"  préparation des lignes (une fois, au règlement) : {temps_preparation:.1f} ms")
+
+    dossier_templates = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'templates')
+    with tempfile.TemporaryDirectory() as dossier:
+        cache = FileSystemBytecodeCache(dossier)
+        filtres = app.jinja_env.filters
+        chargement_a_froid(dossier_templates, filtres, cache)
+        sans_cache = chronometrer(lambda: chargement_a_froid(dossier_templates, filtres, None), args.repetitions)
+        avec_cache = chronometrer(lambda: chargement_a_froid(dossier_templates, filtres, cache), args.repetitions)
+
+    print("Chargement à froid de tous les templates")
+    print(f"  sans cache de bytecode : {sans_cache:.1f} ms")
+    print(f"  avec cache de bytecode : {avec_cache:.1f} ms")
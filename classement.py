@@ -0,0 +1,122 @@
+# classement.py
+
+import heapq
+import itertools
+from bisect import bisect_left, insort
+from collections import Counter
+from itertools import accumulate
+
+# Fonction pour calculer la proximité des numéros entre le participant et le tirage
+def calculate_numbers_proximity(numeros_participant, numeros_tirage):
+    matched_numbers = set(numeros_participant).intersection(numeros_tirage)
+    unmatched_drawn_numbers = list(set(numeros_tirage).difference(matched_numbers))
+    unmatched_participant_numbers = list(set(numeros_participant).difference(matched_numbers))
+
+    if not unmatched_drawn_numbers or not unmatched_participant_numbers:
+        return 0
+
+    permutations = itertools.permutations(unmatched_participant_numbers)
+
+    min_total_proximity = None
+    for perm in permutations:
+        total_proximity = sum(abs(num_draw - num_part) for num_draw, num_part in zip(unmatched_drawn_numbers, perm))
+        if min_total_proximity is None or total_proximity < min_total_proximity:
+            min_total_proximity = total_proximity
+
+    return min_total_proximity
+
+# Fonction pour calculer la proximité des étoiles entre le participant et le tirage
+def calculate_stars_proximity(etoiles_participant, etoiles_tirage):
+    matched_stars = set(etoiles_participant).intersection(etoiles_tirage)
+    unmatched_drawn_stars = list(set(etoiles_tirage).difference(matched_stars))
+    unmatched_participant_stars = list(set(etoiles_participant).difference(matched_stars))
+
+    if not unmatched_drawn_stars or not unmatched_participant_stars:
+        return 0
+
+    permutations = itertools.permutations(unmatched_participant_stars)
+
+    min_total_proximity = None
+    for perm in permutations:
+        total_proximity = sum(abs(star_draw - star_part) for star_draw, star_part in zip(unmatched_drawn_stars, perm))
+        if min_total_proximity is None or total_proximity < min_total_proximity:
+            min_total_proximity = total_proximity
+
+    return min_total_proximity
+
+# Score d'un ticket pour un tirage :
+# (numéros trouvés, étoiles trouvées, proximité numéros, proximité étoiles)
+def scorer(numeros, etoiles, numeros_tirage, etoiles_tirage):
+    return (
+        len(set(numeros_tirage).intersection(numeros)),
+        len(set(etoiles_tirage).intersection(etoiles)),
+        calculate_numbers_proximity(numeros, numeros_tirage),
+        calculate_stars_proximity(etoiles, etoiles_tirage)
+    )
+
+
+# Clé de tri : la plus petite clé correspond au meilleur ticket
+def cle_classement(score):
+    return (-score[0], -score[1], score[2], score[3])
+
+
+def score_de_cle(cle):
+    return (-cle[0], -cle[1], cle[2], cle[3])
+
+
+# Index d'ordre sur les scores d'un tirage : nombre de tickets par clé et
+# liste triée des clés distinctes (quelques milliers au plus, quelle que soit
+# la taille du pool), qui donnent le rang d'un ticket par recherche
+# dichotomique et sommes préfixées au lieu d'un tri de tout le pool. Un ticket
+# ajouté ne coûte qu'un incrément, plus une insertion si sa clé est nouvelle.
+# « regle » indique que les gains enregistrés correspondent à cet index.
+# L'index tient aussi à jour les nb_premiers meilleurs tickets (par position
+# dans le magasin, ex aequo par ordre d'inscription) et l'effectif de chaque
+# classe (numéros, étoiles trouvés) : de quoi calculer les gains du haut du
+# classement sans trier ni relire tout le pool.
+class IndexClassement:
+    def __init__(self, tirage_id, scores, regle=False, nb_premiers=0):
+        self.tirage_id = tirage_id
+        self.taille = len(scores)
+        cles = [cle_classement(score) for score in scores]
+        self.comptes = Counter(cles)
+        self.cles = sorted(self.comptes)
+        self._cumuls = None  # tickets mieux classés que chaque clé, calculé à la demande
+        self.effectifs = Counter((score[0], score[1]) for score in scores)
+        self.nb_premiers = nb_premiers
+        self.premiers = heapq.nsmallest(nb_premiers, ((cle, position) for position, cle in enumerate(cles)))
+        self.regle = regle
+
+    def ajouter(self, scores):
+        for position, score in enumerate(scores, start=self.taille):
+            cle = cle_classement(score)
+            if cle not in self.comptes:
+                insort(self.cles, cle)
+            self.comptes[cle] += 1
+            self.effectifs[score[0], score[1]] += 1
+            if self.nb_premiers and (len(self.premiers) < self.nb_premiers or (cle, position) < self.premiers[-1]):
+                insort(self.premiers, (cle, position))
+                del self.premiers[self.nb_premiers:]
+        self.taille += len(scores)
+        if scores:
+            self._cumuls = None
+            self.regle = False
+
+    def _rang_cle(self, cle):
+        if self._cumuls is None:
+            self._cumuls = [0, *accumulate(self.comptes[c] for c in self.cles)]
+        return self._cumuls[bisect_left(self.cles, cle)] + 1
+
+    # Rang « sportif » : 1 + nombre de tickets strictement meilleurs
+    def rang(self, score):
+        return self._rang_cle(cle_classement(score))
+
+    def ex_aequo(self, score):
+        return self.comptes[cle_classement(score)]
+
+    # Haut du classement : (position, score, rang, ex aequo) par ticket
+    def classement_premiers(self):
+        return [
+            (position, score_de_cle(cle), self._rang_cle(cle), self.comptes[cle])
+            for cle, position in self.premiers
+        ]
@@ -0,0 +1,147 @@
+# coalesceur.py
+
+# Regroupement des inscriptions (« group commit »). Les requêtes concurrentes
+# déposent leur ticket déjà validé dans une file ; un thread d'écriture les
+# enregistre par lots, en une seule transaction, toutes les DELAI ms ou dès
+# que TAILLE tickets attendent. Chaque requête attend le commit de son lot
+# avant de répondre : la durabilité est la même qu'avec un commit par
+# inscription, mais un seul fsync et un seul verrou SQLite sont payés par lot.
+#
+# Activé par GROUP_COMMIT (config.py). N'a d'intérêt qu'avec plusieurs
+# requêtes simultanées par processus (workers gthread ou asgi.py).
+#
+# Aucune erreur ne doit tuer le thread d'écriture ni laisser une requête
+# attendre indéfiniment : chaque demande est marquée terminée quoi qu'il
+# arrive, et une requête n'attend pas plus de GROUP_COMMIT_ATTENTE_S.
+
+import os
+import queue
+import threading
+import time
+import traceback
+
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Participant
+from jeux import selectionner_jeu
+
+
+class InscriptionRefusee(Exception):
+    pass
+
+
+def refus(erreur):
+    return InscriptionRefusee(f"L'inscription n'a pas pu être enregistrée ({erreur}).")
+
+
+class Demande:
+    __slots__ = ('donnees', 'jeu', 'termine', 'erreur')
+
+    def __init__(self, donnees, jeu=None):
+        self.donnees = donnees
+        self.jeu = jeu
+        self.termine = threading.Event()
+        self.erreur = None
+
+
+class Coalesceur:
+    def __init__(self, app, delai_ms, taille, attente_s=30):
+        self.app = app
+        self.delai = delai_ms / 1000
+        self.taille = taille
+        self.attente = attente_s
+        self._file = queue.Queue()
+        self._verrou = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    # Bloque jusqu'au commit du lot contenant ce ticket ; lève
+    # InscriptionRefusee si le ticket n'a pas pu être enregistré
+    def soumettre(self, nom, numeros, etoiles, jeu=None):
+        demande = Demande({'nom': nom, 'numeros': numeros, 'etoiles': etoiles}, jeu)
+        self._demarrer()
+        self._file.put(demande)
+        if not demande.termine.wait(self.attente):
+            raise InscriptionRefusee("L'inscription n'a pas pu être confirmée à temps : vérifiez la liste "
+                                     "des participants avant de réessayer.")
+        if demande.erreur is not None:
+            raise demande.erreur
+
+    # Le thread est démarré à la première inscription, et redémarré après un
+    # fork (les threads ne survivent pas au fork des workers gunicorn) ou
+    # s'il s'est arrêté. Après un fork, la file héritée est abandonnée ; sinon
+    # les demandes déjà déposées restent à traiter.
+    def _demarrer(self):
+        with self._verrou:
+            if self._pid != os.getpid():
+                self._file = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = None
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._boucle, name='coalesceur', daemon=True)
+                self._thread.start()
+
+    def _boucle(self):
+        while True:
+            lot = [self._file.get()]
+            limite = time.monotonic() + self.delai
+            while len(lot) < self.taille:
+                reste = limite - time.monotonic()
+                if reste <= 0:
+                    break
+                try:
+                    lot.append(self._file.get(timeout=reste))
+                except queue.Empty:
+                    break
+            # Une transaction par jeu : chaque jeu écrit dans son propre shard
+            par_jeu = {}
+            for demande in lot:
+                par_jeu.setdefault(demande.jeu, []).append(demande)
+            for jeu, demandes in par_jeu.items():
+                try:
+                    self._ecrire(demandes, jeu)
+                except Exception:
+                    traceback.print_exc()
+
+    def _ecrire(self, lot, jeu=None):
+        try:
+            with self.app.app_context():
+                selectionner_jeu(jeu)
+                try:
+                    db.session.add_all([Participant(**demande.donnees) for demande in lot])
+                    db.session.commit()
+                except Exception:
+                    # Un ticket du lot est en échec (nom pris entre la
+                    # validation et l'écriture, ticket invalide...) : on rejoue
+                    # le lot ticket par ticket pour n'écarter que les fautifs
+                    db.session.rollback()
+                    for demande in lot:
+                        self._ecrire_seule(demande)
+                finally:
+                    db.session.remove()
+        except Exception as e:
+            # Contexte ou shard du jeu indisponible
+            for demande in lot:
+                demande.erreur = demande.erreur or refus(e)
+        finally:
+            for demande in lot:
+                demande.termine.set()
+
+    def _ecrire_seule(self, demande):
+        try:
+            db.session.add(Participant(**demande.donnees))
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            demande.erreur = InscriptionRefusee("Ce nom est déjà pris, veuillez en choisir un autre.")
+        except Exception as e:
+            db.session.rollback()
+            demande.erreur = refus(e)
+
+
+def init_coalesceur(app):
+    coalesceur = None
+    if app.config.get('GROUP_COMMIT'):
+        coalesceur = Coalesceur(app, app.config['GROUP_COMMIT_DELAI_MS'], app.config['GROUP_COMMIT_TAILLE'],
+                                app.config.get('GROUP_COMMIT_ATTENTE_S', 30))
+    app.extensions['coalesceur'] = coalesceur
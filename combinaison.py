@@ -0,0 +1,32 @@
+# combinaison.py
+
+from math import comb
+
+# Un code tient dans un entier signé 64 bits : les tailles de la grille
+# (nombre de numéros et d'étoiles, jusqu'à 15) sur 4 bits chacune, le rang
+# des étoiles sur 16 bits (C(20, 4) = 4845) et celui des numéros sur les 39
+# bits restants (C(70, 10) ≈ 4e11)
+BITS_TAILLE = 4
+BITS_ETOILES = 16
+
+
+# Rang d'un ensemble de numéros (à partir de 1) dans le système combinatoire :
+# pour c_1 < ... < c_k (à partir de 0), rang = somme des C(c_i, i). Deux
+# ensembles de même taille ont le même rang si et seulement s'ils sont égaux.
+def rang_combinaison(valeurs):
+    return sum(comb(v - 1, i) for i, v in enumerate(sorted(valeurs), start=1))
+
+
+# Code canonique d'un ticket (ou d'un tirage) : indépendant de l'ordre de
+# saisie, il permet de retrouver par index tous les tickets identiques. Les
+# rangs ne sont uniques qu'à taille égale ([1, 2, 3, 4] et [1, 2, 3, 4, 5]
+# ont tous deux le rang 0) : les tailles font donc partie du code.
+# None si la grille est trop grande pour tenir sur 64 bits.
+def code_ticket(numeros, etoiles):
+    taille_numeros, taille_etoiles = len(numeros), len(etoiles)
+    rang_etoiles = rang_combinaison(etoiles)
+    if max(taille_numeros, taille_etoiles) >= 1 << BITS_TAILLE or rang_etoiles >= 1 << BITS_ETOILES:
+        return None
+    code = rang_combinaison(numeros) << BITS_ETOILES | rang_etoiles
+    code = (code << BITS_TAILLE | taille_numeros) << BITS_TAILLE | taille_etoiles
+    return code if code < 1 << 63 else None
@@ -18,7 +18,43 @@ class Config:
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Réplique en lecture (routage.py). REPLICATION_LOCALE simule la
+    # réplication entre deux fichiers SQLite pour le développement
+    REPLICA_DATABASE_URL = os.environ.get("REPLICA_DATABASE_URL")
+    SQLALCHEMY_BINDS = {"replica": REPLICA_DATABASE_URL} if REPLICA_DATABASE_URL else {}
+    REPLICATION_LOCALE = os.environ.get("REPLICATION_LOCALE", "0") == "1"
+    REPLICATION_DELAI = float(os.environ.get("REPLICATION_DELAI", 0))
+    READ_YOUR_WRITES_SECONDES = float(os.environ.get("READ_YOUR_WRITES_SECONDES", 5))
+
+    # Regroupement des inscriptions concurrentes en une transaction (coalesceur.py)
+    GROUP_COMMIT = os.environ.get("GROUP_COMMIT", "0") == "1"
+    GROUP_COMMIT_DELAI_MS = int(os.environ.get("GROUP_COMMIT_DELAI_MS", 5))
+    GROUP_COMMIT_TAILLE = int(os.environ.get("GROUP_COMMIT_TAILLE", 200))
+    GROUP_COMMIT_ATTENTE_S = float(os.environ.get("GROUP_COMMIT_ATTENTE_S", 30))
+
+    # Délai de regroupement des changements avant la préparation du
+    # classement diffusé en direct (diffusion.py)
+    DIFFUSION_DELAI_MS = int(os.environ.get("DIFFUSION_DELAI_MS", 100))
+
+    # Shard de chaque jeu (jeux.py) : URL formatée avec l'id du jeu. Un
+    # fichier SQLite par jeu par défaut ; sur PostgreSQL, un schéma par jeu,
+    # p. ex. postgresql://.../loto?options=-csearch_path%3Djeu_{jeu}
+    SHARD_URL = os.environ.get("SHARD_URL", f"sqlite:///{INSTANCE_DIR / 'jeux' / 'jeu_{jeu}.db'}")
+
+    # Profilage à la demande (profilage.py) : fraction des requêtes tirées au
+    # sort, jeton de l'en-tête X-Profilage (et de la page /profils)
+    PROFILAGE_TAUX = float(os.environ.get("PROFILAGE_TAUX", 0))
+    PROFILAGE_JETON = os.environ.get("PROFILAGE_JETON")
+    PROFILAGE_INTERVALLE_MS = float(os.environ.get("PROFILAGE_INTERVALLE_MS", 5))
+    PROFILAGE_DOSSIER = os.environ.get("PROFILAGE_DOSSIER", str(INSTANCE_DIR / "profiles"))
+
+    # Bytecode des templates Jinja compilés (vues.py), remplissable au
+    # déploiement avec « flask compile-templates »
+    JINJA_CACHE_DOSSIER = os.environ.get("JINJA_CACHE_DOSSIER", str(INSTANCE_DIR / "jinja_cache"))
+
 
 class TestConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    SQLALCHEMY_BINDS = {}
+    JINJA_CACHE_DOSSIER = None
@@ -0,0 +1,125 @@
+# diffusion.py
+
+import json
+import queue
+import threading
+import traceback
+
+TAILLE_FILE = 100
+
+
+def message_sse(evenement, donnees):
+    return f"event: {evenement}\ndata: {json.dumps(donnees)}\n\n"
+
+
+def ligne_classement(participant):
+    return {
+        'nom': participant.nom,
+        'numeros': list(participant.numeros),
+        'etoiles': list(participant.etoiles),
+        'match_numeros': participant.match_numeros,
+        'match_etoiles': participant.match_etoiles,
+        'numbers_proximity': participant.numbers_proximity,
+        'stars_proximity': participant.stars_proximity,
+        'gain': participant.gain
+    }
+
+
+# Diffuseur en mémoire du classement (un par processus). Chaque calcul est
+# mis en forme une seule fois puis déposé dans la file de chaque abonné :
+# un événement « tirage » complet au changement de tirage, puis de petits
+# événements « diff » ne contenant que les rangs qui ont changé.
+#
+# Le classement n'est jamais préparé dans la requête qui modifie les tickets :
+# elle se contente de signaler() le changement, et la préparation a lieu
+# DELAI plus tard dans un thread à part, une seule fois pour toute une rafale
+# d'inscriptions.
+class Diffuseur:
+    def __init__(self, delai=0.1):
+        self._verrou = threading.Lock()
+        self._abonnes = set()
+        self.delai = delai
+        self.preparer = None  # prépare et publie (publier) le classement courant
+        self._prevu = False
+        self._verrou_preparation = threading.Lock()
+        self.tirage = None
+        self.classement = []
+
+    @property
+    def abonnes(self):
+        return len(self._abonnes)
+
+    def abonner(self, abonne=None):
+        if abonne is None:
+            abonne = queue.Queue(maxsize=TAILLE_FILE)
+
+        # Premier abonné : l'état courant est préparé tout de suite
+        if self.tirage is None and self.preparer:
+            self._preparer()
+
+        with self._verrou:
+            self._abonnes.add(abonne)
+            if self.tirage is not None:
+                abonne.put_nowait(message_sse('tirage', {'tirage': self.tirage, 'classement': self.classement}))
+        return abonne
+
+    def desabonner(self, abonne):
+        with self._verrou:
+            self._abonnes.discard(abonne)
+
+    # Les tickets ou le tirage ont changé. La préparation a lieu même sans
+    # abonné : elle tient aussi à jour l'index de classement du magasin, que
+    # les requêtes ne construisent jamais elles-mêmes.
+    def signaler(self):
+        with self._verrou:
+            if self._prevu or self.preparer is None:
+                return
+            self._prevu = True
+        minuteur = threading.Timer(self.delai, self._executer)
+        minuteur.daemon = True
+        minuteur.start()
+
+    def _executer(self):
+        # Les changements signalés à partir d'ici programment une nouvelle préparation
+        with self._verrou:
+            self._prevu = False
+        self._preparer()
+
+    def _preparer(self):
+        with self._verrou_preparation:
+            try:
+                self.preparer()
+            except Exception:
+                traceback.print_exc()
+
+    def publier(self, tirage, classement):
+        with self._verrou:
+            if self.tirage is None or tirage['id'] != self.tirage['id']:
+                message = message_sse('tirage', {'tirage': tirage, 'classement': classement})
+            else:
+                changements = [
+                    dict(ligne, rang=rang)
+                    for rang, ligne in enumerate(classement, start=1)
+                    if rang > len(self.classement) or self.classement[rang - 1] != ligne
+                ]
+                if not changements and len(classement) == len(self.classement):
+                    return
+                message = message_sse('diff', {'changements': changements, 'taille': len(classement)})
+
+            self.tirage = tirage
+            self.classement = classement
+
+            for abonne in list(self._abonnes):
+                try:
+                    abonne.put_nowait(message)
+                except queue.Full:
+                    # Client trop lent : on vide sa file et on le déconnecte
+                    # plutôt que de bloquer les autres
+                    self._abonnes.discard(abonne)
+                    with abonne.mutex:
+                        abonne.queue.clear()
+                    abonne.put_nowait(None)
+
+
+def init_diffuseur(app):
+    app.extensions['diffuseur'] = Diffuseur(app.config.get('DIFFUSION_DELAI_MS', 100) / 1000)
@@ -0,0 +1,156 @@
+# jeux.py
+
+# Plusieurs jeux indépendants, chacun sur son propre shard. Le registre des
+# jeux (table jeu) reste sur la base principale ; les tables d'un jeu
+# (réglages, participants, tirages, statistiques) vivent dans le shard du
+# jeu, dont l'URL est SHARD_URL formatée avec l'id du jeu : un fichier
+# SQLite par jeu, ou un schéma par jeu sur PostgreSQL. Deux jeux ne
+# partagent donc ni fichier, ni verrou d'écriture : leurs inscriptions et
+# leurs règlements avancent en parallèle.
+#
+# Les routes d'un jeu sont les routes habituelles préfixées par
+# /jeux/<id> : PrefixeJeu retire le préfixe de PATH_INFO et le déplace dans
+# SCRIPT_NAME, si bien que url_for() reste dans le jeu sans rien changer aux
+# vues ni aux templates. Sans préfixe, on est sur le jeu par défaut, qui
+# utilise la base principale comme avant.
+
+import re
+import threading
+from pathlib import Path
+
+from flask import abort, current_app, g, has_app_context, request
+from sqlalchemy import create_engine, select
+
+from models import db, Jeu
+
+PREFIXE = re.compile(r'^/jeux/(\d+)(/.*)?$')
+
+# Tables communes à tous les jeux, jamais créées dans un shard
+TABLES_REGISTRE = {'jeu'}
+
+_verrou_etats = threading.Lock()
+
+
+class PrefixeJeu:
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        correspondance = PREFIXE.match(environ.get('PATH_INFO', ''))
+        if correspondance:
+            jeu_id = correspondance.group(1)
+            environ['loto.jeu'] = int(jeu_id)
+            environ['loto.racine'] = environ.get('SCRIPT_NAME', '')
+            environ['SCRIPT_NAME'] = f"{environ.get('SCRIPT_NAME', '')}/jeux/{jeu_id}"
+            environ['PATH_INFO'] = correspondance.group(2) or '/'
+        return self.wsgi_app(environ, start_response)
+
+
+# Routeur de shards : un moteur par jeu, créé (avec ses tables) à la
+# première utilisation puis conservé pour la vie du processus
+class RouteurShards:
+    def __init__(self, url):
+        self.url = url
+        self._moteurs = {}
+        self._verrou = threading.Lock()
+
+    def url_du_jeu(self, jeu_id):
+        return self.url.format(jeu=jeu_id)
+
+    def moteur(self, jeu_id):
+        moteur = self._moteurs.get(jeu_id)
+        if moteur is None:
+            with self._verrou:
+                moteur = self._moteurs.get(jeu_id)
+                if moteur is None:
+                    moteur = self._creer(jeu_id)
+                    self._moteurs[jeu_id] = moteur
+        return moteur
+
+    def _creer(self, jeu_id):
+        moteur = create_engine(self.url_du_jeu(jeu_id))
+        if moteur.url.get_backend_name() == 'sqlite' and moteur.url.database:
+            Path(moteur.url.database).parent.mkdir(parents=True, exist_ok=True)
+        tables = [t for t in db.metadata.sorted_tables if t.name not in TABLES_REGISTRE]
+        db.metadata.create_all(moteur, tables=tables)
+        return moteur
+
+    def fermer(self):
+        with self._verrou:
+            for moteur in self._moteurs.values():
+                moteur.dispose()
+            self._moteurs.clear()
+
+
+# Jeu courant (None : jeu par défaut, sur la base principale)
+def jeu_courant():
+    return g.get('jeu') if has_app_context() else None
+
+
+# Moteur où vivent les tables du jeu courant
+def moteur_courant():
+    moteur = g.get('moteur_jeu') if has_app_context() else None
+    return moteur if moteur is not None else db.engine
+
+
+# Place le reste du contexte d'application sur le shard du jeu donné
+def selectionner_jeu(jeu_id):
+    g.jeu = jeu_id
+    g.moteur_jeu = current_app.extensions['shards'].moteur(jeu_id) if jeu_id is not None else None
+
+
+# État en mémoire propre au jeu courant (magasin de tickets, diffuseur...) :
+# celui de app.extensions[cle] pour le jeu par défaut, sinon une instance par
+# jeu créée par fabrique(jeu_id)
+def etat_du_jeu(cle, fabrique):
+    jeu_id = jeu_courant()
+    if jeu_id is None:
+        return current_app.extensions[cle]
+    etats = current_app.extensions.setdefault(f'{cle}_par_jeu', {})
+    etat = etats.get(jeu_id)
+    if etat is None:
+        with _verrou_etats:
+            etat = etats.setdefault(jeu_id, fabrique(jeu_id))
+    return etat
+
+
+# Le registre est toujours lu sur la base principale, jamais sur un shard
+# ni sur la réplique (un jeu tout juste créé doit être visible)
+def lire_jeu(jeu_id):
+    return db.session.execute(
+        select(Jeu).where(Jeu.id == jeu_id),
+        bind_arguments={'bind': db.engine}
+    ).scalar_one_or_none()
+
+
+# URL de l'application hors de tout jeu (sans le préfixe /jeux/<id>)
+def racine():
+    return request.environ.get('loto.racine', request.script_root)
+
+
+def lister_jeux():
+    return db.session.execute(
+        select(Jeu).order_by(Jeu.id),
+        bind_arguments={'bind': db.engine}
+    ).scalars().all()
+
+
+def init_jeux(app):
+    app.extensions['shards'] = RouteurShards(app.config['SHARD_URL'])
+    app.wsgi_app = PrefixeJeu(app.wsgi_app)
+
+    @app.before_request
+    def choisir_jeu():
+        jeu_id = request.environ.get('loto.jeu')
+        if jeu_id is None:
+            return
+        if lire_jeu(jeu_id) is None:
+            abort(404)
+        selectionner_jeu(jeu_id)
+
+    # Le contexte d'application peut survivre à la requête (tests, contexte
+    # déjà poussé) : on ne laisse pas le jeu s'y attarder
+    @app.teardown_request
+    def oublier_jeu(exc):
+        g.pop('jeu', None)
+        g.pop('moteur_jeu', None)
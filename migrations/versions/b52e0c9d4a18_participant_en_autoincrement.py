@@ -0,0 +1,35 @@
+"""Participant en AUTOINCREMENT
+
+Revision ID: b52e0c9d4a18
+Revises: e81f4b6c2d37
+Create Date: 2026-10-19 21:42:10.275903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b52e0c9d4a18'
+down_revision = 'e81f4b6c2d37'
+branch_labels = None
+depends_on = None
+
+
+# Sans AUTOINCREMENT, SQLite réutilise les ids d'une table vidée, ce qui
+# trompe le rechargement incrémental du magasin de tickets. Sur les autres
+# bases, la séquence ne revient jamais en arrière : rien à faire.
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    with op.batch_alter_table('participant', recreate='always',
+                              table_kwargs={'sqlite_autoincrement': True}) as batch_op:
+        pass
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    with op.batch_alter_table('participant', recreate='always',
+                              table_kwargs={'sqlite_autoincrement': False}) as batch_op:
+        pass
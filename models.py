@@ -1,11 +1,23 @@
 # models.py
 
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 
-db = SQLAlchemy()
+from combinaison import code_ticket
+from routage import SessionRoutee
+
+db = SQLAlchemy(session_options={'class_': SessionRoutee})
 
 # Modèle pour les participants
 class Participant(db.Model):
+    __table_args__ = (
+        # Rang d'un ticket réglé par simple comptage (/api/participants/<nom>/result)
+        db.Index('ix_participant_classement', 'match_numeros', 'match_etoiles', 'numbers_proximity', 'stars_proximity'),
+        # AUTOINCREMENT : SQLite ne réutilise jamais un id, même après avoir vidé
+        # la table ; (nombre, plus grand id) identifie donc un état de la table
+        {'sqlite_autoincrement': True},
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     nom = db.Column(db.String(100), nullable=False, unique=True)
     numeros = db.Column(db.PickleType)
@@ -15,12 +27,21 @@ class Participant(db.Model):
     match_etoiles = db.Column(db.Integer, default=0)
     numbers_proximity = db.Column(db.Integer, default=0)  # Proximité des numéros
     stars_proximity = db.Column(db.Integer, default=0)    # Proximité des étoiles
+    combinaison = db.Column(db.BigInteger, index=True)    # Code canonique du ticket (combinaison.py)
+
+# Le code canonique est calculé à l'insertion, quel que soit le chemin d'ajout
+@event.listens_for(Participant, 'before_insert')
+def calculer_combinaison(mapper, connection, participant):
+    participant.combinaison = code_ticket(participant.numeros or [], participant.etoiles or [])
 
 # Modèle pour le tirage
 class Tirage(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     numeros = db.Column(db.PickleType)
     etoiles = db.Column(db.PickleType)
+    bareme = db.Column(db.PickleType)  # Barème des gains figé au moment du tirage
+    regle_nb = db.Column(db.Integer)      # Nombre de tickets lors du dernier calcul des gains
+    regle_max_id = db.Column(db.Integer)  # Plus grand id de ticket lors de ce calcul
 
 # Modèle pour les réglages
 class Settings(db.Model):
@@ -32,6 +53,23 @@ class Settings(db.Model):
     selection_numeros = db.Column(db.Integer, default=5)
     selection_etoiles = db.Column(db.Integer, default=2)
     max_gagnants = db.Column(db.Integer, default=10)
+    bareme = db.Column(db.PickleType)  # Barème personnalisé (None : barème par défaut)
+
+# Modèle pour les compteurs de statistiques, maintenus par statistiques.py
+class Statistique(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    categorie = db.Column(db.String(20), nullable=False)
+    valeur = db.Column(db.Integer, nullable=False)
+    compteur = db.Column(db.Integer, nullable=False, default=0)
+    dernier_tirage_id = db.Column(db.Integer)
+    __table_args__ = (db.UniqueConstraint('categorie', 'valeur'),)
+
+# Registre des jeux, sur la base principale ; les tables ci-dessus existent
+# aussi dans le shard de chaque jeu (jeux.py)
+class Jeu(db.Model):
+    registre = True  # jamais routé vers un shard (routage.py)
+    id = db.Column(db.Integer, primary_key=True)
+    nom = db.Column(db.String(100), nullable=False, unique=True)
 
 def init_db():
     db.create_all()
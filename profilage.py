@@ -0,0 +1,138 @@
+# profilage.py
+
+# Profilage à la demande des requêtes, pour voir où passe le temps en
+# production (dépicklage des tickets, proximités, tri, rendu du template...).
+# Une requête est profilée si elle porte l'en-tête X-Profilage avec le jeton
+# PROFILAGE_JETON, ou tirée au sort avec la probabilité PROFILAGE_TAUX.
+#
+# Le profileur est un échantillonneur : un thread relève la pile du thread de
+# la requête toutes les PROFILAGE_INTERVALLE_MS ms. Le coût est négligeable
+# pour les requêtes non profilées, et faible pour les autres. Chaque profil
+# est écrit au format « collapsed stacks » (une pile par ligne, cadres
+# séparés par « ; », suivie du nombre d'échantillons), lisible par
+# flamegraph.pl, speedscope ou inferno, dans PROFILAGE_DOSSIER ; index.jsonl
+# y recense les profils capturés.
+
+import hmac
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from flask import g, request
+
+INDEX = 'index.jsonl'
+
+
+def nom_cadre(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Echantillonneur:
+    def __init__(self, intervalle):
+        self.intervalle = intervalle
+        self.piles = Counter()
+        self.echantillons = 0
+        self._cible = threading.get_ident()
+        self._arret = threading.Event()
+        self._thread = threading.Thread(target=self._boucle, name='profilage', daemon=True)
+
+    def demarrer(self):
+        self._thread.start()
+        return self
+
+    def arreter(self):
+        self._arret.set()
+        self._thread.join()
+        return self
+
+    def _boucle(self):
+        while not self._arret.wait(self.intervalle):
+            frame = sys._current_frames().get(self._cible)
+            pile = []
+            while frame is not None:
+                pile.append(nom_cadre(frame))
+                frame = frame.f_back
+            if pile:
+                self.piles[';'.join(reversed(pile))] += 1
+                self.echantillons += 1
+
+    def ecrire(self, fichier):
+        for pile, nombre in self.piles.most_common():
+            fichier.write(f"{pile} {nombre}\n")
+
+
+class Profileur:
+    def __init__(self, dossier, taux=0.0, jeton=None, intervalle_ms=5):
+        self.dossier = Path(dossier)
+        self.taux = taux
+        self.jeton = jeton
+        self.intervalle = intervalle_ms / 1000
+        self._verrou = threading.Lock()
+
+    def jeton_valide(self, valeur):
+        return bool(self.jeton and valeur) and hmac.compare_digest(valeur.encode(), self.jeton.encode())
+
+    def doit_profiler(self):
+        if self.jeton_valide(request.headers.get('X-Profilage')):
+            return True
+        return self.taux > 0 and random.random() < self.taux
+
+    def enregistrer(self, echantillonneur, duree, entree):
+        self.dossier.mkdir(parents=True, exist_ok=True)
+        nom = f"{int(time.time() * 1000)}_{os.getpid()}_{entree['endpoint'] or 'inconnu'}.folded"
+        with open(self.dossier / nom, 'w') as fichier:
+            echantillonneur.ecrire(fichier)
+
+        entree = dict(entree, fichier=nom, duree_ms=round(duree * 1000, 1),
+                      echantillons=echantillonneur.echantillons, date=time.strftime('%Y-%m-%d %H:%M:%S'))
+        with self._verrou, open(self.dossier / INDEX, 'a') as index:
+            index.write(json.dumps(entree) + '\n')
+
+    # Profils capturés, du plus lent au plus rapide
+    def plus_lents(self, n=50):
+        try:
+            with open(self.dossier / INDEX) as index:
+                entrees = [json.loads(ligne) for ligne in index if ligne.strip()]
+        except FileNotFoundError:
+            return []
+        return sorted(entrees, key=lambda e: e['duree_ms'], reverse=True)[:n]
+
+
+def init_profilage(app):
+    profileur = Profileur(
+        app.config['PROFILAGE_DOSSIER'],
+        app.config.get('PROFILAGE_TAUX', 0.0),
+        app.config.get('PROFILAGE_JETON'),
+        app.config.get('PROFILAGE_INTERVALLE_MS', 5)
+    )
+    app.extensions['profileur'] = profileur
+
+    if not profileur.taux and not profileur.jeton:
+        return
+
+    @app.before_request
+    def demarrer_profilage():
+        if profileur.doit_profiler():
+            g.profilage = (Echantillonneur(profileur.intervalle).demarrer(), time.perf_counter())
+
+    # teardown_request : aussi appelé quand la vue lève une exception
+    @app.teardown_request
+    def arreter_profilage(exc):
+        profilage = g.pop('profilage', None)
+        if profilage is None:
+            return
+        echantillonneur, debut = profilage
+        duree = time.perf_counter() - debut
+        echantillonneur.arreter()
+        profileur.enregistrer(echantillonneur, duree, {
+            'methode': request.method,
+            'chemin': request.script_root + request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'erreur': repr(exc) if exc is not None else None
+        })
@@ -0,0 +1,109 @@
+# routage.py
+
+# Routage lecture/écriture entre la base principale et une réplique déclarée
+# dans SQLALCHEMY_BINDS['replica']. Les routes en lecture seule
+# (ROUTES_LECTURE) lisent sur la réplique ; tout le reste, les flush et les
+# requêtes INSERT/UPDATE/DELETE vont sur la base principale. Après un POST,
+# le même client lit sur la principale pendant READ_YOUR_WRITES_SECONDES pour
+# voir ses propres écritures malgré le retard de réplication.
+
+import sqlite3
+import threading
+import time
+
+from flask import current_app, g, has_app_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+ROUTES_LECTURE = {'index', 'rules', 'participants_route', 'resultats'}
+
+
+class SessionRoutee(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        # Requête d'un jeu (jeux.py) : lectures et écritures sur son shard,
+        # sauf pour le registre des jeux qui reste sur la base principale
+        if (bind is None and has_app_context() and g.get('moteur_jeu') is not None
+                and not getattr(getattr(mapper, 'class_', None), 'registre', False)):
+            return g.moteur_jeu
+        if (bind is None and not self._flushing and has_app_context() and g.get('lecture_replique')
+                and not getattr(clause, 'is_dml', False)):
+            replique = self._db.engines.get('replica')
+            if replique is not None:
+                return replique
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+# Bascule le reste de la requête sur la base principale (avant une écriture,
+# ou quand la réplique n'a pas encore les données nécessaires)
+def utiliser_primaire():
+    g.lecture_replique = False
+
+
+# Substitut de réplication pour le développement : copie le fichier SQLite
+# principal vers celui de la réplique (API de sauvegarde de sqlite3), après
+# chaque commit, immédiatement ou après REPLICATION_DELAI secondes
+class ReplicationSQLite:
+    def __init__(self, primaire, replique, delai=0):
+        self.primaire = primaire
+        self.replique = replique
+        self.delai = delai
+        self._verrou = threading.Lock()
+
+    def repliquer(self):
+        with self._verrou:
+            source = sqlite3.connect(self.primaire)
+            destination = sqlite3.connect(self.replique)
+            try:
+                source.backup(destination)
+            finally:
+                destination.close()
+                source.close()
+
+    def planifier(self):
+        if self.delai > 0:
+            minuteur = threading.Timer(self.delai, self.repliquer)
+            minuteur.daemon = True
+            minuteur.start()
+        else:
+            self.repliquer()
+
+
+@event.listens_for(SessionRoutee, 'after_commit')
+def repliquer_apres_commit(session_db):
+    if has_app_context():
+        replication = current_app.extensions.get('replication')
+        if replication is not None:
+            replication.planifier()
+
+
+def chemin_sqlite_fichier(uri):
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite' and url.database and url.database != ':memory:':
+        return url.database
+    return None
+
+
+def init_routage(app):
+    if 'replica' not in app.config.get('SQLALCHEMY_BINDS', {}):
+        return
+
+    if app.config.get('REPLICATION_LOCALE'):
+        primaire = chemin_sqlite_fichier(app.config['SQLALCHEMY_DATABASE_URI'])
+        replique = chemin_sqlite_fichier(app.config['SQLALCHEMY_BINDS']['replica'])
+        if primaire and replique:
+            replication = ReplicationSQLite(primaire, replique, app.config.get('REPLICATION_DELAI', 0))
+            replication.repliquer()
+            app.extensions['replication'] = replication
+
+    @app.before_request
+    def choisir_base():
+        if request.method in ('GET', 'HEAD') and request.endpoint in ROUTES_LECTURE:
+            derniere_ecriture = session.get('derniere_ecriture', 0)
+            g.lecture_replique = time.time() - derniere_ecriture > app.config['READ_YOUR_WRITES_SECONDES']
+
+    @app.after_request
+    def memoriser_ecriture(response):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            session['derniere_ecriture'] = time.time()
+        return response
@@ -0,0 +1,139 @@
+# snapshot.py
+
+# Format binaire des snapshots de tickets, pour régler ou rejouer un tirage
+# hors de la base de production :
+#
+#   entête (ENTETE) | métadonnées JSON | bourrage jusqu'à 8 octets
+#   ids        : nb_tickets x int64
+#   numéros    : nb_tickets x largeur_numeros entiers (uint8 ou uint16)
+#   étoiles    : nb_tickets x largeur_etoiles entiers (même type)
+#
+# Les tickets sont à largeur fixe ; les tickets plus courts sont complétés
+# par des 0 (jamais un numéro valide). La lecture se fait sur une vue mmap :
+# aucun ticket n'est copié ni désérialisé.
+
+import json
+import mmap
+import struct
+from array import array
+
+from bareme import repartir_gains
+from classement import cle_classement, scorer
+
+MAGIC = b'LOTO'
+VERSION = 1
+
+# magic, version, largeur numéros, largeur étoiles, type des entiers,
+# nombre de tickets, taille des métadonnées
+ENTETE = struct.Struct('<4sHBBcxQI')
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def ecrire_snapshot(fichier, store, meta):
+    nb = len(store)
+    largeur_numeros = max((store.numeros_offsets[i + 1] - store.numeros_offsets[i] for i in range(nb)), default=0)
+    largeur_etoiles = max((store.etoiles_offsets[i + 1] - store.etoiles_offsets[i] for i in range(nb)), default=0)
+    typecode = 'B' if max(store.numeros, default=0) < 256 and max(store.etoiles, default=0) < 256 else 'H'
+
+    def empiler(valeurs, offsets, largeur):
+        if len(valeurs) == nb * largeur:
+            return array(typecode, valeurs)
+        resultat = array(typecode, bytes(nb * largeur * array(typecode).itemsize))
+        for i in range(nb):
+            ligne = valeurs[offsets[i]:offsets[i + 1]]
+            resultat[i * largeur:i * largeur + len(ligne)] = array(typecode, ligne)
+        return resultat
+
+    meta = json.dumps(meta).encode()
+    entete = ENTETE.pack(MAGIC, VERSION, largeur_numeros, largeur_etoiles, typecode.encode(), nb, len(meta))
+    bourrage = -(len(entete) + len(meta)) % 8
+
+    fichier.write(entete)
+    fichier.write(meta)
+    fichier.write(bytes(bourrage))
+    fichier.write(array('q', store.ids).tobytes())
+    fichier.write(empiler(store.numeros, store.numeros_offsets, largeur_numeros).tobytes())
+    fichier.write(empiler(store.etoiles, store.etoiles_offsets, largeur_etoiles).tobytes())
+
+
+# Vue en lecture seule d'un snapshot ; à utiliser comme gestionnaire de contexte
+class Snapshot:
+    def __init__(self, chemin):
+        self._fichier = open(chemin, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._fichier.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._fichier.close()
+            raise SnapshotError("Snapshot vide.")
+
+        vue = memoryview(self._mmap)
+        if len(vue) < ENTETE.size:
+            self.close()
+            raise SnapshotError("Snapshot tronqué.")
+        magic, version, self.largeur_numeros, self.largeur_etoiles, typecode, self.nb_tickets, taille_meta = ENTETE.unpack_from(vue)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise SnapshotError("Ce fichier n'est pas un snapshot de tickets reconnu.")
+
+        typecode = typecode.decode()
+        taille = array(typecode).itemsize
+        debut = ENTETE.size + taille_meta
+        self.meta = json.loads(bytes(vue[ENTETE.size:debut]))
+        debut += -debut % 8
+
+        fin_ids = debut + 8 * self.nb_tickets
+        fin_numeros = fin_ids + taille * self.nb_tickets * self.largeur_numeros
+        fin_etoiles = fin_numeros + taille * self.nb_tickets * self.largeur_etoiles
+        if len(vue) < fin_etoiles:
+            self.close()
+            raise SnapshotError("Snapshot tronqué.")
+
+        self.ids = vue[debut:fin_ids].cast('q')
+        self.numeros = vue[fin_ids:fin_numeros].cast(typecode)
+        self.etoiles = vue[fin_numeros:fin_etoiles].cast(typecode)
+
+    def __len__(self):
+        return self.nb_tickets
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for attribut in ('ids', 'numeros', 'etoiles'):
+            vue = self.__dict__.pop(attribut, None)
+            if vue is not None:
+                vue.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Des vues sont encore référencées : le mmap sera libéré avec elles
+            pass
+        self._fichier.close()
+
+    def numeros_de(self, i):
+        ligne = self.numeros[i * self.largeur_numeros:(i + 1) * self.largeur_numeros]
+        return ligne if 0 not in ligne else [v for v in ligne if v]
+
+    def etoiles_de(self, i):
+        ligne = self.etoiles[i * self.largeur_etoiles:(i + 1) * self.largeur_etoiles]
+        return ligne if 0 not in ligne else [v for v in ligne if v]
+
+
+# Règlement d'un tirage sur un snapshot : mêmes règles que calculer_gains
+# dans app.py, sans contexte d'application ni ORM
+def regler_snapshot(snapshot, numeros_tirage, etoiles_tirage, bareme, jackpot):
+    numeros_tirage = list(numeros_tirage)
+    etoiles_tirage = list(etoiles_tirage)
+    scores = [
+        scorer(snapshot.numeros_de(i), snapshot.etoiles_de(i), numeros_tirage, etoiles_tirage)
+        for i in range(len(snapshot))
+    ]
+    ordre = sorted(range(len(scores)), key=lambda i: cle_classement(scores[i]))
+    gains = repartir_gains(scores, ordre, bareme, jackpot)
+    return scores, ordre, gains
@@ -0,0 +1,240 @@
+# statistiques.py
+
+# Statistiques de l'historique des tirages et des choix des participants.
+# Les compteurs (table Statistique) sont mis à jour dans la même transaction
+# que chaque insertion ou suppression d'un Tirage ou d'un Participant : la
+# lecture ne parcourt jamais les tirages ni les tickets, seulement
+# O(max_numeros) compteurs.
+#
+# Les insertions et suppressions d'un flush ne font qu'accumuler des deltas
+# par (catégorie, valeur) ; after_flush les applique en une requête par
+# catégorie (executemany), quel que soit le nombre de tickets du flush.
+
+from collections import Counter
+
+from sqlalchemy import bindparam, delete, event, func, insert, select, update
+from sqlalchemy.orm import Session, object_session
+
+from models import db, Participant, Statistique, Tirage
+
+TIRAGE_NUMEROS = 'tirage_numeros'
+TIRAGE_ETOILES = 'tirage_etoiles'
+CHOIX_NUMEROS = 'choix_numeros'
+CHOIX_ETOILES = 'choix_etoiles'
+TOTAL_TIRAGES = 'total_tirages'
+TOTAL_PARTICIPANTS = 'total_participants'
+
+
+# Deltas en attente pour la connexion du flush (celle du shard du jeu) :
+# compteurs et dernier tirage par (catégorie, valeur)
+class Deltas:
+    def __init__(self):
+        self.compteurs = Counter()
+        self.derniers = {}
+
+    def ajouter(self, categorie, valeurs, delta, tirage_id=None):
+        for valeur in valeurs:
+            self.compteurs[categorie, valeur] += delta
+            if tirage_id is not None:
+                self.derniers[categorie, valeur] = max(tirage_id, self.derniers.get((categorie, valeur), 0))
+
+
+def _deltas(objet, connexion):
+    en_attente = object_session(objet).info.setdefault('deltas_statistiques', {})
+    return en_attente.setdefault(connexion, Deltas())
+
+
+def _appliquer(connexion, deltas):
+    table = Statistique.__table__
+    par_categorie = {}
+    for categorie, valeur in set(deltas.compteurs) | set(deltas.derniers):
+        par_categorie.setdefault(categorie, []).append(valeur)
+    existantes = set(connexion.execute(
+        select(table.c.categorie, table.c.valeur).where(table.c.categorie.in_(par_categorie))
+    ).all())
+
+    modification = (
+        update(table)
+        .where(table.c.categorie == bindparam('b_categorie'), table.c.valeur == bindparam('b_valeur'))
+        .values(compteur=table.c.compteur + bindparam('b_delta'),
+                dernier_tirage_id=func.coalesce(bindparam('b_dernier'), table.c.dernier_tirage_id))
+    )
+    for categorie, valeurs in par_categorie.items():
+        a_modifier, a_creer = [], []
+        for valeur in valeurs:
+            delta = deltas.compteurs[categorie, valeur]
+            dernier = deltas.derniers.get((categorie, valeur))
+            if (categorie, valeur) in existantes:
+                a_modifier.append({'b_categorie': categorie, 'b_valeur': valeur, 'b_delta': delta, 'b_dernier': dernier})
+            else:
+                a_creer.append({'categorie': categorie, 'valeur': valeur, 'compteur': max(delta, 0),
+                                'dernier_tirage_id': dernier})
+        if a_modifier:
+            connexion.execute(modification, a_modifier)
+        if a_creer:
+            connexion.execute(insert(table), a_creer)
+
+
+def _compter_participant(deltas, participant, delta):
+    deltas.ajouter(CHOIX_NUMEROS, set(participant.numeros or []), delta)
+    deltas.ajouter(CHOIX_ETOILES, set(participant.etoiles or []), delta)
+    deltas.ajouter(TOTAL_PARTICIPANTS, [0], delta)
+
+
+@event.listens_for(Participant, 'after_insert')
+def participant_ajoute(mapper, connexion, participant):
+    _compter_participant(_deltas(participant, connexion), participant, 1)
+
+
+@event.listens_for(Participant, 'after_delete')
+def participant_supprime(mapper, connexion, participant):
+    _compter_participant(_deltas(participant, connexion), participant, -1)
+
+
+@event.listens_for(Tirage, 'after_insert')
+def tirage_ajoute(mapper, connexion, tirage):
+    # Les ids croissent : le nouveau tirage est le dernier pour ses numéros
+    deltas = _deltas(tirage, connexion)
+    deltas.ajouter(TIRAGE_NUMEROS, set(tirage.numeros or []), 1, tirage_id=tirage.id)
+    deltas.ajouter(TIRAGE_ETOILES, set(tirage.etoiles or []), 1, tirage_id=tirage.id)
+    deltas.ajouter(TOTAL_TIRAGES, [0], 1)
+
+
+@event.listens_for(Tirage, 'after_delete')
+def tirage_supprime(mapper, connexion, tirage):
+    deltas = _deltas(tirage, connexion)
+    deltas.ajouter(TIRAGE_NUMEROS, set(tirage.numeros or []), -1)
+    deltas.ajouter(TIRAGE_ETOILES, set(tirage.etoiles or []), -1)
+    deltas.ajouter(TOTAL_TIRAGES, [0], -1)
+
+    # Cas rare : on recherche le tirage précédent des seuls numéros dont le
+    # tirage supprimé était le dernier, en remontant l'historique
+    table = Statistique.__table__
+    orphelins = set(connexion.execute(
+        select(table.c.categorie, table.c.valeur).where(table.c.dernier_tirage_id == tirage.id)
+    ).all())
+    connexion.execute(update(table).where(table.c.dernier_tirage_id == tirage.id).values(dernier_tirage_id=None))
+
+    lignes = connexion.execute(
+        select(Tirage.id, Tirage.numeros, Tirage.etoiles).where(Tirage.id < tirage.id).order_by(Tirage.id.desc())
+    )
+    for id, numeros, etoiles in lignes:
+        if not orphelins:
+            break
+        trouves = {(TIRAGE_NUMEROS, n) for n in numeros or []} | {(TIRAGE_ETOILES, e) for e in etoiles or []}
+        for categorie, valeur in orphelins & trouves:
+            connexion.execute(
+                update(table).where(table.c.categorie == categorie, table.c.valeur == valeur).values(dernier_tirage_id=id)
+            )
+        orphelins -= trouves
+
+
+# Chaque flush repart de zéro : les deltas d'un flush échoué ne doivent pas
+# être appliqués au suivant
+@event.listens_for(Session, 'before_flush')
+def oublier_deltas(session, flush_context, instances):
+    session.info.pop('deltas_statistiques', None)
+
+
+@event.listens_for(Session, 'after_flush')
+def appliquer_deltas(session, flush_context):
+    for connexion, deltas in session.info.pop('deltas_statistiques', {}).items():
+        _appliquer(connexion, deltas)
+
+
+# Les suppressions en masse (Query.delete) ne déclenchent pas les événements
+# ci-dessus : après une suppression de tous les participants, on remet
+# simplement les compteurs de choix à zéro
+def reinitialiser_choix():
+    db.session.execute(
+        update(Statistique)
+        .where(Statistique.categorie.in_([CHOIX_NUMEROS, CHOIX_ETOILES, TOTAL_PARTICIPANTS]))
+        .values(compteur=0)
+    )
+
+
+# Reconstruit tous les compteurs à partir des tables Tirage et Participant
+def reconstruire_statistiques():
+    compteurs = {categorie: Counter() for categorie in
+                 (TIRAGE_NUMEROS, TIRAGE_ETOILES, CHOIX_NUMEROS, CHOIX_ETOILES, TOTAL_TIRAGES, TOTAL_PARTICIPANTS)}
+    derniers = {}
+
+    tirages = db.session.execute(
+        select(Tirage.id, Tirage.numeros, Tirage.etoiles).order_by(Tirage.id).execution_options(yield_per=1000)
+    )
+    for id, numeros, etoiles in tirages:
+        compteurs[TOTAL_TIRAGES][0] += 1
+        for categorie, valeurs in ((TIRAGE_NUMEROS, numeros), (TIRAGE_ETOILES, etoiles)):
+            for valeur in set(valeurs or []):
+                compteurs[categorie][valeur] += 1
+                derniers[(categorie, valeur)] = id
+
+    participants = db.session.execute(
+        select(Participant.numeros, Participant.etoiles).execution_options(yield_per=1000)
+    )
+    for numeros, etoiles in participants:
+        compteurs[TOTAL_PARTICIPANTS][0] += 1
+        compteurs[CHOIX_NUMEROS].update(set(numeros or []))
+        compteurs[CHOIX_ETOILES].update(set(etoiles or []))
+
+    db.session.execute(delete(Statistique))
+    lignes = [
+        {'categorie': categorie, 'valeur': valeur, 'compteur': compteur,
+         'dernier_tirage_id': derniers.get((categorie, valeur))}
+        for categorie, compteur_categorie in compteurs.items()
+        for valeur, compteur in compteur_categorie.items()
+    ]
+    if lignes:
+        db.session.execute(insert(Statistique), lignes)
+    db.session.commit()
+    return len(lignes)
+
+
+# Statistiques prêtes à afficher : une ligne par numéro et par étoile possible
+def lire_statistiques(settings):
+    # Tirages plus récents que le dernier tirage de chaque numéro : un
+    # comptage sur la clé primaire, les ids pouvant avoir des trous
+    # (tirages supprimés)
+    plus_recents = select(func.count(Tirage.id)).where(Tirage.id > Statistique.dernier_tirage_id).scalar_subquery()
+
+    compteurs = {}
+    derniers = {}
+    ecarts = {}
+    for categorie, valeur, compteur, dernier, ecart in db.session.execute(
+        select(Statistique.categorie, Statistique.valeur, Statistique.compteur, Statistique.dernier_tirage_id,
+               plus_recents)
+    ):
+        compteurs[(categorie, valeur)] = compteur
+        derniers[(categorie, valeur)] = dernier
+        ecarts[(categorie, valeur)] = ecart
+
+    def lignes(categorie_tirage, categorie_choix, maximum):
+        return [
+            {
+                'valeur': valeur,
+                'tirages': compteurs.get((categorie_tirage, valeur), 0),
+                'choix': compteurs.get((categorie_choix, valeur), 0),
+                # Nombre de tirages depuis la dernière sortie (None : jamais sorti)
+                'ecart': ecarts[(categorie_tirage, valeur)]
+                         if derniers.get((categorie_tirage, valeur)) is not None else None
+            }
+            for valeur in range(1, maximum + 1)
+        ]
+
+    numeros = lignes(TIRAGE_NUMEROS, CHOIX_NUMEROS, settings.max_numeros)
+    etoiles = lignes(TIRAGE_ETOILES, CHOIX_ETOILES, settings.max_etoiles)
+    jamais = float('inf')
+
+    return {
+        'tirages': compteurs.get((TOTAL_TIRAGES, 0), 0),
+        'participants': compteurs.get((TOTAL_PARTICIPANTS, 0), 0),
+        'numeros': numeros,
+        'etoiles': etoiles,
+        'numeros_en_retard': [
+            ligne['valeur'] for ligne in
+            sorted(numeros, key=lambda l: jamais if l['ecart'] is None else l['ecart'], reverse=True)[:5]
+        ],
+        'numeros_populaires': [
+            ligne['valeur'] for ligne in sorted(numeros, key=lambda l: l['choix'], reverse=True)[:5]
+        ]
+    }
@@ -0,0 +1,105 @@
+# tests/test_api_lecture.py
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+import unittest
+from app import create_app
+from models import db, Participant, Tirage
+from config import TestConfig
+from api_lecture import LectureAPI
+
+class TestApiLecture(unittest.TestCase):
+
+    def setUp(self):
+        self.dossier = tempfile.TemporaryDirectory()
+        chemin = os.path.join(self.dossier.name, 'test.db')
+
+        class FileConfig(TestConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{chemin}"
+
+        self.app = create_app(config_class=FileConfig)
+        self.app.testing = True
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        db.session.add(Participant(nom='Alice', numeros=[1, 2, 3, 4, 5], etoiles=[1, 2], match_numeros=5))
+        db.session.add(Participant(nom='Bob', numeros=[6, 7, 8, 9, 10], etoiles=[3, 4], match_numeros=1))
+        db.session.add(Tirage(numeros=[1, 2, 3, 4, 5], etoiles=[1, 2]))
+        db.session.commit()
+
+        self.api = LectureAPI(self.app)
+
+    def tearDown(self):
+        asyncio.run(self.api.fermer())
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+        self.app_context.pop()
+        self.dossier.cleanup()
+
+    def get(self, path, query=b''):
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        async def appel():
+            scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': query, 'headers': []}
+            try:
+                await self.api(scope, receive, send)
+            finally:
+                await self.api.fermer()
+
+        asyncio.run(appel())
+        statut = messages[0]['status']
+        corps = b''.join(m.get('body', b'') for m in messages[1:])
+        return statut, json.loads(corps) if corps else None
+
+    def test_dernier_tirage(self):
+        statut, donnees = self.get('/api/tirage/dernier')
+        self.assertEqual(statut, 200)
+        self.assertEqual(donnees['numeros'], [1, 2, 3, 4, 5])
+        self.assertEqual(donnees, self.client.get('/api/tirage/dernier').get_json())
+
+    def test_dernier_tirage_long_polling_expire(self):
+        statut, donnees = self.get('/api/tirage/dernier', b'apres=1000')
+        self.assertEqual(statut, 204)
+        self.assertIsNone(donnees)
+
+    def test_classement(self):
+        statut, donnees = self.get('/api/classement')
+        self.assertEqual(statut, 200)
+        self.assertEqual([p['nom'] for p in donnees], ['Alice', 'Bob'])
+        self.assertEqual(donnees, self.client.get('/api/classement').get_json())
+
+    def test_participant(self):
+        statut, donnees = self.get('/api/participants/Bob')
+        self.assertEqual(statut, 200)
+        self.assertEqual(donnees['etoiles'], [3, 4])
+        statut, _ = self.get('/api/participants/Inconnu')
+        self.assertEqual(statut, 404)
+
+    def test_vue_synchrone_sans_attente(self):
+        # La vue Flask répond tout de suite, quelle que soit ?attente=
+        for attente in ('nan', '30'):
+            debut = time.monotonic()
+            response = self.client.get(f'/api/tirage/dernier?apres=1000&attente={attente}')
+            self.assertEqual(response.status_code, 204)
+            self.assertLess(time.monotonic() - debut, 1)
+
+    def test_parametres_invalides(self):
+        # Comme les vues Flask : valeur par défaut plutôt qu'une erreur 500
+        statut, donnees = self.get('/api/classement', b'n=abc')
+        self.assertEqual(statut, 200)
+        self.assertEqual([p['nom'] for p in donnees], ['Alice', 'Bob'])
+        statut, donnees = self.get('/api/tirage/dernier', b'apres=x&attente=nan')
+        self.assertEqual(statut, 200)
+        self.assertEqual(donnees['numeros'], [1, 2, 3, 4, 5])
@@ -0,0 +1,127 @@
+# tests/test_bareme.py
+
+import unittest
+from app import create_app
+from models import db, Settings
+from config import TestConfig
+import random
+from classement import IndexClassement, cle_classement
+from bareme import Repartition, bareme_par_defaut, parser_bareme, formater_bareme, repartir_gains
+
+class TestBareme(unittest.TestCase):
+
+    def test_bareme_par_defaut(self):
+        self.assertEqual([p['pourcentage'] for p in bareme_par_defaut(10)], [40, 20, 12, 7, 6, 5, 4, 3, 2, 1])
+        self.assertAlmostEqual(sum(p['pourcentage'] for p in bareme_par_defaut(3)), 100)
+        bareme = bareme_par_defaut(5000)
+        self.assertEqual(bareme[-1], {'debut': 11, 'fin': 5000, 'pourcentage': 10})
+        self.assertAlmostEqual(sum(p['pourcentage'] for p in bareme), 100)
+
+    def test_repartition_moins_de_tickets_que_de_rangs(self):
+        scores = [(5, 2, 0, 0), (3, 0, 4, 2)]
+        gains = repartir_gains(scores, [0, 1], bareme_par_defaut(10), 600)
+        self.assertAlmostEqual(gains[0], 400)
+        self.assertAlmostEqual(gains[1], 200)
+
+    def test_repartition_ex_aequo(self):
+        scores = [(5, 2, 0, 0), (3, 0, 4, 2), (3, 0, 4, 2), (1, 0, 9, 2)]
+        bareme = [{'debut': 1, 'fin': 1, 'pourcentage': 50},
+                  {'debut': 2, 'fin': 2, 'pourcentage': 30},
+                  {'debut': 3, 'fin': 3, 'pourcentage': 20}]
+        gains = repartir_gains(scores, [0, 1, 2, 3], bareme, 1000)
+        self.assertEqual(gains, [500, 250, 250, 0])
+
+    def test_repartition_par_classe(self):
+        scores = [(5, 2, 0, 0), (3, 0, 4, 2), (3, 0, 5, 2), (3, 0, 9, 1)]
+        bareme = [{'debut': 1, 'fin': 1, 'pourcentage': 70}, {'classe': (3, 0), 'pourcentage': 30}]
+        gains = repartir_gains(scores, [0, 1, 2, 3], bareme, 900)
+        self.assertEqual(gains, [630, 90, 90, 90])
+
+    def test_repartition_plage_de_rangs(self):
+        scores = [(0, 0, i, 0) for i in range(3000)]
+        bareme = [{'debut': 1, 'fin': 1000, 'pourcentage': 100}]
+        gains = repartir_gains(scores, list(range(3000)), bareme, 1000)
+        self.assertAlmostEqual(gains[999], 1)
+        self.assertEqual(gains[1000], 0)
+
+    def test_gains_des_premiers_depuis_l_index(self):
+        hasard = random.Random(7)
+        scores = [(hasard.randint(0, 2), hasard.randint(0, 1), hasard.randint(0, 3), 0) for _ in range(300)]
+        bareme = [{'debut': 1, 'fin': 3, 'pourcentage': 60}, {'debut': 4, 'fin': 12, 'pourcentage': 30},
+                  {'classe': (2, 1), 'pourcentage': 10}]
+        ordre = sorted(range(len(scores)), key=lambda i: cle_classement(scores[i]))
+        attendus = repartir_gains(scores, ordre, bareme, 1000)
+
+        index = IndexClassement(1, scores[:200], nb_premiers=15)
+        index.ajouter(scores[200:])
+        repartition = Repartition(bareme, index.taille, index.effectifs)
+        premiers = index.classement_premiers()
+        self.assertEqual([position for position, _, _, _ in premiers], ordre[:15])
+        for position, score, rang, ex_aequo in premiers:
+            gain = 1000 * repartition.part(rang - 1, rang - 1 + ex_aequo, (score[0], score[1])) / 100
+            self.assertAlmostEqual(gain, attendus[position])
+
+    def test_parser_bareme(self):
+        texte = "1: 40\n2-10: 30\n5+2: 10"
+        bareme = parser_bareme(texte)
+        self.assertEqual(bareme[1], {'debut': 2, 'fin': 10, 'pourcentage': 30})
+        self.assertEqual(bareme[2], {'classe': (5, 2), 'pourcentage': 10})
+        self.assertEqual(formater_bareme(bareme), texte)
+
+        with self.assertRaises(ValueError):
+            parser_bareme("1-5: 50\n3-8: 20")
+        with self.assertRaises(ValueError):
+            parser_bareme("1: 80\n2: 30")
+        with self.assertRaises(ValueError):
+            parser_bareme("premier: 10")
+        with self.assertRaises(ValueError):
+            parser_bareme("1-5000: 100", max_gagnants=10)
+        for valeur in ('nan', 'inf', '-inf'):
+            with self.assertRaises(ValueError):
+                parser_bareme(f"1: {valeur}")
+        self.assertEqual(len(parser_bareme("1-10: 90\n5+2: 10", max_gagnants=10)), 2)
+
+
+class TestReglagesBareme(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app(config_class=TestConfig)
+        self.app.testing = True
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def formulaire(self, **valeurs):
+        donnees = {
+            'max_participants': '20000',
+            'jackpot_amount': '3000000',
+            'max_numeros': '49',
+            'max_etoiles': '9',
+            'selection_numeros': '5',
+            'selection_etoiles': '2',
+            'max_gagnants': '2000'
+        }
+        donnees.update(valeurs)
+        return donnees
+
+    def test_settings_bareme(self):
+        self.client.post('/settings', data=self.formulaire(bareme="1: 50\n2-2000: 50"))
+        settings = Settings.query.first()
+        self.assertEqual(settings.max_gagnants, 2000)
+        self.assertEqual(settings.bareme[1], {'debut': 2, 'fin': 2000, 'pourcentage': 50})
+
+    def test_settings_bareme_invalide(self):
+        response = self.client.post('/settings', data=self.formulaire(bareme="1: 150"))
+        self.assertIn('dépasse 100 %'.encode(), response.data)
+        self.assertEqual(Settings.query.first().max_gagnants, 10)
+
+    def test_settings_bareme_au_dela_des_gagnants(self):
+        response = self.client.post('/settings', data=self.formulaire(max_gagnants='10', bareme="1-5000: 100"))
+        self.assertIn('dépasse le nombre maximum de gagnants (10)'.encode(), response.data)
+        self.assertIsNone(Settings.query.first().bareme)
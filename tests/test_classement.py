@@ -0,0 +1,103 @@
+# tests/test_classement.py
+
+import time
+import unittest
+from app import create_app
+from models import db, Participant, Tirage
+from config import TestConfig
+from classement import IndexClassement, scorer
+from ticket_store import get_ticket_store
+
+class TestIndexClassement(unittest.TestCase):
+
+    def test_rang_et_ex_aequo(self):
+        index = IndexClassement(1, [(5, 2, 0, 0), (3, 1, 4, 0), (3, 1, 4, 0), (0, 0, 20, 3)], regle=True)
+        self.assertEqual(index.rang((5, 2, 0, 0)), 1)
+        self.assertEqual(index.rang((3, 1, 4, 0)), 2)
+        self.assertEqual(index.ex_aequo((3, 1, 4, 0)), 2)
+        self.assertEqual(index.rang((0, 0, 20, 3)), 4)
+
+        index.ajouter([(4, 0, 1, 1)])
+        self.assertEqual(index.rang((3, 1, 4, 0)), 3)
+        self.assertEqual(index.taille, 5)
+        self.assertFalse(index.regle)
+        # Une clé par score distinct, pas une par ticket
+        self.assertEqual(len(index.cles), 4)
+        self.assertEqual(index.ex_aequo((1, 1, 1, 1)), 0)
+
+    def test_scorer(self):
+        self.assertEqual(scorer([1, 2, 3, 4, 6], [1, 3], [1, 2, 3, 4, 5], [1, 2]), (4, 1, 1, 1))
+
+
+class TestResultatParticipant(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app(config_class=TestConfig)
+        self.app.testing = True
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    # L'index de classement est construit en arrière-plan : 503 en attendant
+    def resultat(self, nom):
+        limite = time.monotonic() + 5
+        response = self.client.get(f'/api/participants/{nom}/result')
+        while response.status_code == 503 and time.monotonic() < limite:
+            self.assertEqual(response.headers['Retry-After'], '1')
+            time.sleep(0.05)
+            response = self.client.get(f'/api/participants/{nom}/result')
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()
+
+    def test_resultat_participant(self):
+        db.session.add(Participant(nom='Alice', numeros=[1, 2, 3, 4, 5], etoiles=[1, 2]))
+        db.session.add(Participant(nom='Bob', numeros=[1, 2, 3, 10, 11], etoiles=[1, 2]))
+        db.session.add(Participant(nom='Carla', numeros=[1, 2, 3, 10, 11], etoiles=[1, 2]))
+        db.session.add(Tirage(numeros=[1, 2, 3, 4, 5], etoiles=[1, 2]))
+        db.session.commit()
+
+        donnees = self.resultat('Bob')
+        self.assertEqual(donnees['rang'], 2)
+        self.assertEqual(donnees['ex_aequo'], 2)
+        self.assertEqual(donnees['match_numeros'], 3)
+        self.assertFalse(donnees['regle'])
+
+        self.client.get('/resultats')
+        donnees = self.resultat('Alice')
+        self.assertEqual(donnees['rang'], 1)
+        self.assertTrue(donnees['regle'])
+        self.assertGreater(donnees['gain'], 0)
+
+        db.session.add(Participant(nom='Dan', numeros=[1, 2, 3, 4, 5], etoiles=[1, 3]))
+        db.session.commit()
+        donnees = self.resultat('Bob')
+        self.assertEqual(donnees['rang'], 3)
+        self.assertEqual(donnees['participants'], 4)
+        self.assertFalse(donnees['regle'])
+
+    def test_resultat_regle_par_comptage(self):
+        db.session.add(Participant(nom='Alice', numeros=[1, 2, 3, 4, 5], etoiles=[1, 2]))
+        db.session.add(Participant(nom='Bob', numeros=[1, 2, 3, 10, 11], etoiles=[1, 2]))
+        db.session.add(Participant(nom='Carla', numeros=[1, 2, 3, 10, 11], etoiles=[1, 2]))
+        db.session.add(Participant(nom='Dan', numeros=[1, 2, 3, 10, 12], etoiles=[1, 3]))
+        db.session.add(Tirage(numeros=[1, 2, 3, 4, 5], etoiles=[1, 2]))
+        db.session.commit()
+        self.client.get('/resultats')
+
+        # Réglé : réponse immédiate par comptage, sans index en mémoire
+        get_ticket_store().index_classement = None
+        donnees = self.client.get('/api/participants/Carla/result').get_json()
+        self.assertEqual((donnees['rang'], donnees['ex_aequo'], donnees['participants']), (2, 2, 4))
+        self.assertTrue(donnees['regle'])
+        donnees = self.client.get('/api/participants/Dan/result').get_json()
+        self.assertEqual((donnees['rang'], donnees['ex_aequo']), (4, 1))
+
+    def test_resultat_participant_inconnu(self):
+        response = self.client.get('/api/participants/Personne/result')
+        self.assertEqual(response.status_code, 404)
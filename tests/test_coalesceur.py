@@ -0,0 +1,111 @@
+# tests/test_coalesceur.py
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from app import create_app
+from models import db, Participant, Settings
+from config import TestConfig
+from coalesceur import Demande, InscriptionRefusee
+
+class TestCoalesceur(unittest.TestCase):
+
+    def setUp(self):
+        self.dossier = tempfile.TemporaryDirectory()
+        chemin = os.path.join(self.dossier.name, 'test.db')
+
+        class GroupCommitConfig(TestConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{chemin}"
+            GROUP_COMMIT = True
+            GROUP_COMMIT_DELAI_MS = 20
+
+        self.app = create_app(config_class=GroupCommitConfig)
+        self.app.testing = True
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        Settings.query.first().max_participants = 1000
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+        self.app_context.pop()
+        self.dossier.cleanup()
+
+    def inscrire(self, nom, reponses):
+        response = self.app.test_client().post('/inscription', data={
+            'nom': nom,
+            'numeros': ['1', '2', '3', '4', '5'],
+            'etoiles': ['1', '2']
+        })
+        reponses[nom] = response
+
+    def test_inscriptions_concurrentes(self):
+        reponses = {}
+        threads = [threading.Thread(target=self.inscrire, args=(f'Joueur_{i}', reponses)) for i in range(30)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertTrue(all(r.status_code == 302 for r in reponses.values()))
+        self.assertEqual(Participant.query.count(), 30)
+
+    def test_nom_en_conflit_dans_un_lot(self):
+        reponses = {}
+        coalesceur = self.app.extensions['coalesceur']
+        erreurs = []
+
+        def soumettre():
+            try:
+                coalesceur.soumettre('Doublon', [1, 2, 3, 4, 5], [1, 2])
+            except Exception as e:
+                erreurs.append(e)
+
+        threads = [threading.Thread(target=soumettre) for _ in range(3)]
+        threads.append(threading.Thread(target=self.inscrire, args=('Unique', reponses)))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(erreurs), 2)
+        self.assertEqual(Participant.query.filter_by(nom='Doublon').count(), 1)
+        self.assertIsNotNone(Participant.query.filter_by(nom='Unique').first())
+
+    def test_erreur_pendant_le_rejeu(self):
+        coalesceur = self.app.extensions['coalesceur']
+        # Le ticket impicklable fait échouer le lot, puis son propre rejeu,
+        # sans IntegrityError
+        lot = [Demande({'nom': 'Valide', 'numeros': [1, 2, 3, 4, 5], 'etoiles': [1, 2]}),
+               Demande({'nom': 'Invalide', 'numeros': [lambda: 0], 'etoiles': [1, 2]})]
+        coalesceur._ecrire(lot)
+
+        self.assertTrue(all(demande.termine.is_set() for demande in lot))
+        self.assertIsNone(lot[0].erreur)
+        self.assertIsInstance(lot[1].erreur, InscriptionRefusee)
+        self.assertIsNotNone(Participant.query.filter_by(nom='Valide').first())
+
+    def test_redemarrage_et_attente_bornee(self):
+        coalesceur = self.app.extensions['coalesceur']
+        coalesceur._demarrer()
+        coalesceur._thread = threading.Thread(target=lambda: None)
+        coalesceur._thread.start()
+        coalesceur._thread.join()
+
+        # Thread d'écriture arrêté : redémarré à la soumission suivante
+        coalesceur.soumettre('Apres', [1, 2, 3, 4, 5], [1, 2])
+        self.assertTrue(coalesceur._thread.is_alive())
+        self.assertIsNotNone(Participant.query.filter_by(nom='Apres').first())
+
+        # Écriture bloquée : la requête abandonne au bout de l'attente
+        coalesceur.attente = 0.1
+        coalesceur._ecrire = lambda lot, jeu=None: time.sleep(0.5)
+        debut = time.monotonic()
+        with self.assertRaises(InscriptionRefusee):
+            coalesceur.soumettre('Bloque', [1, 2, 3, 4, 5], [1, 2])
+        self.assertLess(time.monotonic() - debut, 0.4)
@@ -0,0 +1,72 @@
+# tests/test_combinaison.py
+
+import itertools
+import time
+import unittest
+from app import create_app
+from models import db, Participant, Tirage
+from config import TestConfig
+from combinaison import code_ticket, rang_combinaison
+
+class TestCombinaison(unittest.TestCase):
+
+    def test_rangs_bijectifs(self):
+        rangs = sorted(rang_combinaison(c) for c in itertools.combinations(range(1, 21), 4))
+        self.assertEqual(rangs, list(range(len(rangs))))
+
+    def test_code_independant_de_l_ordre(self):
+        self.assertEqual(code_ticket([5, 1, 3, 2, 4], [2, 1]), code_ticket([1, 2, 3, 4, 5], [1, 2]))
+        self.assertNotEqual(code_ticket([1, 2, 3, 4, 5], [1, 2]), code_ticket([1, 2, 3, 4, 5], [1, 3]))
+
+    def test_codes_distincts_selon_la_taille(self):
+        grilles = [([1, 2, 3, 4], [1, 2]), ([1, 2, 3, 4, 5], [1, 2]), ([1, 2, 3, 4, 5, 6], [1, 2]),
+                   ([1, 2, 3, 4, 5], [1]), ([1, 2, 3, 4, 5], [1, 2, 3])]
+        codes = {code_ticket(numeros, etoiles) for numeros, etoiles in grilles}
+        self.assertEqual(len(codes), len(grilles))
+
+
+class TestCombinaisonRoutes(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app(config_class=TestConfig)
+        self.app.testing = True
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_jackpot_et_tickets_identiques(self):
+        db.session.add(Participant(nom='Alice', numeros=[1, 2, 3, 4, 5], etoiles=[1, 2]))
+        db.session.add(Participant(nom='Bob', numeros=[5, 4, 3, 2, 1], etoiles=[2, 1]))
+        db.session.add(Participant(nom='Carla', numeros=[1, 2, 3, 4, 6], etoiles=[1, 2]))
+        db.session.add(Tirage(numeros=[3, 1, 2, 5, 4], etoiles=[1, 2]))
+        db.session.commit()
+
+        self.assertIsNotNone(Participant.query.filter_by(nom='Alice').first().combinaison)
+        donnees = self.client.get('/api/tirage/dernier/jackpot').get_json()
+        self.assertEqual(donnees['gagnants'], ['Alice', 'Bob'])
+
+        # Index de classement construit en arrière-plan (503 en attendant)
+        limite = time.monotonic() + 5
+        response = self.client.get('/api/participants/Alice/result')
+        while response.status_code == 503 and time.monotonic() < limite:
+            time.sleep(0.05)
+            response = self.client.get('/api/participants/Alice/result')
+        self.assertEqual(response.get_json()['meme_combinaison'], 1)
+
+    def test_jackpot_grille_sans_code(self):
+        # Grilles de 10 numéros : code hors de 64 bits, combinaison NULL
+        db.session.add(Participant(nom='Alice', numeros=list(range(75, 85)), etoiles=[1, 2]))
+        db.session.add(Participant(nom='Bob', numeros=list(range(90, 80, -1)), etoiles=[2, 1]))
+        db.session.add(Participant(nom='Carla', numeros=list(range(71, 81)), etoiles=[1, 2]))
+        db.session.add(Tirage(numeros=list(range(81, 91)), etoiles=[1, 2]))
+        db.session.commit()
+
+        self.assertIsNone(Participant.query.filter_by(nom='Alice').first().combinaison)
+        donnees = self.client.get('/api/tirage/dernier/jackpot').get_json()
+        self.assertEqual(donnees['gagnants'], ['Bob'])
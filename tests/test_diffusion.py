@@ -0,0 +1,134 @@
+# tests/test_diffusion.py
+
+import json
+import threading
+import unittest
+from app import create_app
+from models import db, Participant, Tirage
+from config import TestConfig
+from diffusion import Diffuseur
+
+TIRAGE = {'id': 1, 'numeros': [1, 2, 3, 4, 5], 'etoiles': [1, 2]}
+
+
+def ligne(nom, gain):
+    return {'nom': nom, 'numeros': [], 'etoiles': [], 'match_numeros': 0, 'match_etoiles': 0,
+            'numbers_proximity': 0, 'stars_proximity': 0, 'gain': gain}
+
+
+def lire(message):
+    evenement, donnees = message.strip().split('\n')
+    return evenement[len('event: '):], json.loads(donnees[len('data: '):])
+
+
+class TestDiffuseur(unittest.TestCase):
+
+    def test_tirage_puis_diff(self):
+        diffuseur = Diffuseur()
+        abonne = diffuseur.abonner()
+        diffuseur.publier(TIRAGE, [ligne('A', 10), ligne('B', 5)])
+        evenement, donnees = lire(abonne.get_nowait())
+        self.assertEqual(evenement, 'tirage')
+        self.assertEqual(len(donnees['classement']), 2)
+
+        diffuseur.publier(TIRAGE, [ligne('A', 10), ligne('C', 3), ligne('B', 2)])
+        evenement, donnees = lire(abonne.get_nowait())
+        self.assertEqual(evenement, 'diff')
+        self.assertEqual([c['rang'] for c in donnees['changements']], [2, 3])
+        self.assertEqual(donnees['taille'], 3)
+
+        # Aucun changement : rien n'est envoyé
+        diffuseur.publier(TIRAGE, [ligne('A', 10), ligne('C', 3), ligne('B', 2)])
+        self.assertTrue(abonne.empty())
+
+    def test_nouvel_abonne_recoit_etat_courant(self):
+        diffuseur = Diffuseur()
+        diffuseur.publier(TIRAGE, [ligne('A', 10)])
+        evenement, donnees = lire(diffuseur.abonner().get_nowait())
+        self.assertEqual(evenement, 'tirage')
+        self.assertEqual(donnees['tirage'], TIRAGE)
+
+    def test_abonne_lent_deconnecte(self):
+        diffuseur = Diffuseur()
+        abonne = diffuseur.abonner()
+        for i in range(200):
+            diffuseur.publier(dict(TIRAGE, id=i), [])
+        self.assertEqual(diffuseur.abonnes, 0)
+        self.assertIsNone(abonne.get_nowait())
+
+    def test_changements_regroupes_hors_requete(self):
+        diffuseur = Diffuseur(delai=0.05)
+        preparations = []
+        fini = threading.Event()
+
+        def preparer():
+            preparations.append(threading.current_thread())
+            diffuseur.publier(dict(TIRAGE, id=len(preparations)), [])
+            if len(preparations) == 2:
+                fini.set()
+
+        diffuseur.preparer = preparer
+        diffuseur.abonner()
+        self.assertEqual(preparations, [threading.current_thread()])
+
+        for _ in range(5):
+            diffuseur.signaler()
+        self.assertTrue(fini.wait(5))
+        self.assertEqual(len(preparations), 2)
+        self.assertIsNot(preparations[1], threading.current_thread())
+
+    def test_erreur_de_preparation(self):
+        diffuseur = Diffuseur(delai=0)
+        appels = []
+
+        def preparer():
+            appels.append(1)
+            raise RuntimeError("base indisponible")
+
+        diffuseur.preparer = preparer
+        diffuseur.abonner()
+        self.assertEqual(len(appels), 1)
+        self.assertEqual(diffuseur.abonnes, 1)
+
+
+class TestResultatsStream(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app(config_class=TestConfig)
+        self.app.testing = True
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_stream(self):
+        db.session.add(Participant(nom='Alice', numeros=[1, 2, 3, 4, 5], etoiles=[1, 2]))
+        db.session.add(Tirage(numeros=[1, 2, 3, 4, 5], etoiles=[1, 2]))
+        db.session.commit()
+
+        response = self.client.get('/resultats/stream')
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        flux = response.response
+        evenement, donnees = lire(next(flux).decode())
+        self.assertEqual(evenement, 'tirage')
+        self.assertEqual(donnees['classement'][0]['nom'], 'Alice')
+
+        self.client.post('/inscription', data={
+            'nom': 'Bob',
+            'numeros': ['1', '2', '3', '4', '6'],
+            'etoiles': ['1', '2']
+        })
+        evenement, donnees = lire(next(flux).decode())
+        self.assertEqual(evenement, 'diff')
+        self.assertEqual(donnees['changements'][-1]['nom'], 'Bob')
+        # Gain provisoire diffusé, sans règlement en base
+        self.assertAlmostEqual(donnees['changements'][-1]['gain'], 1000000)
+        self.assertEqual(Participant.query.filter_by(nom='Bob').first().gain, 0)
+
+        response.close()
+        self.assertEqual(self.app.extensions['diffuseur'].abonnes, 0)
@@ -0,0 +1,122 @@
+# tests/test_jeux.py
+
+import os
+import tempfile
+import unittest
+from app import create_app
+from models import db, Jeu, Participant, Settings, Statistique
+from config import TestConfig
+from jeux import selectionner_jeu
+
+class TestJeux(unittest.TestCase):
+
+    def setUp(self):
+        self.dossier = tempfile.TemporaryDirectory()
+        dossier = self.dossier.name
+
+        class ShardConfig(TestConfig):
+            SHARD_URL = f"sqlite:///{os.path.join(dossier, 'jeu_{jeu}.db')}"
+
+        self.app = create_app(config_class=ShardConfig)
+        self.app.testing = True
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app.extensions['shards'].fermer()
+        self.app_context.pop()
+        self.dossier.cleanup()
+
+    def creer_jeu(self, nom):
+        response = self.client.post('/jeux', data={'nom': nom})
+        self.assertEqual(response.status_code, 302)
+        return Jeu.query.filter_by(nom=nom).one().id
+
+    def inscrire(self, jeu_id, nom, numeros):
+        return self.client.post(f'/jeux/{jeu_id}/inscription', data={
+            'nom': nom,
+            'numeros': [str(n) for n in numeros],
+            'etoiles': ['1', '2']
+        })
+
+    def test_creation_d_un_jeu(self):
+        jeu_id = self.creer_jeu('Loto du vendredi')
+        self.assertTrue(os.path.exists(os.path.join(self.dossier.name, f'jeu_{jeu_id}.db')))
+
+        response = self.client.get('/jeux')
+        self.assertIn(b'Loto du vendredi', response.data)
+        self.assertIn(f'/jeux/{jeu_id}/'.encode(), response.data)
+
+        # Les liens générés restent dans le jeu
+        response = self.client.get(f'/jeux/{jeu_id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(f'/jeux/{jeu_id}/inscription'.encode(), response.data)
+
+    def test_jeu_inconnu(self):
+        response = self.client.get('/jeux/99/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_jeux_isoles(self):
+        premier = self.creer_jeu('Premier')
+        second = self.creer_jeu('Second')
+
+        self.client.post(f'/jeux/{premier}/settings', data={
+            'max_participants': 10, 'jackpot_amount': 1000, 'max_numeros': 49,
+            'max_etoiles': 9, 'selection_numeros': 5, 'selection_etoiles': 2, 'max_gagnants': 3
+        })
+        self.inscrire(premier, 'Alice', [1, 2, 3, 4, 5])
+        # Même nom dans un autre jeu : autorisé, les shards sont indépendants
+        self.inscrire(second, 'Alice', [6, 7, 8, 9, 10])
+        self.inscrire(second, 'Bob', [1, 2, 3, 4, 5])
+
+        # Rien dans la base principale (jeu par défaut)
+        self.assertEqual(Participant.query.count(), 0)
+
+        with self.app.app_context():
+            selectionner_jeu(premier)
+            self.assertEqual([p.nom for p in Participant.query.all()], ['Alice'])
+            self.assertEqual(Settings.query.first().jackpot_amount, 1000)
+
+        with self.app.app_context():
+            selectionner_jeu(second)
+            self.assertEqual(Participant.query.count(), 2)
+            self.assertEqual(Settings.query.first().jackpot_amount, 3000000)
+
+        self.client.post(f'/jeux/{premier}/tirage')
+        response = self.client.get(f'/jeux/{premier}/resultats')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Alice', response.data)
+        self.assertNotIn(b'Bob', response.data)
+
+        # Le tirage du premier jeu ne règle pas le second
+        donnees = self.client.get(f'/jeux/{second}/api/classement').get_json()
+        self.assertEqual(sorted(p['nom'] for p in donnees), ['Alice', 'Bob'])
+        self.assertTrue(all(p['gain'] == 0 for p in donnees))
+
+    def test_commandes_sur_un_jeu(self):
+        jeu_id = self.creer_jeu('Commandes')
+        self.inscrire(jeu_id, 'Alice', [1, 2, 3, 4, 5])
+        self.inscrire(jeu_id, 'Bob', [6, 7, 8, 9, 10])
+        runner = self.app.test_cli_runner()
+
+        chemin = os.path.join(self.dossier.name, 'jeu.snap')
+        resultat = runner.invoke(args=['export-snapshot', chemin, '--jeu', str(jeu_id)])
+        self.assertEqual(resultat.exit_code, 0, resultat.output)
+        self.assertIn('2 tickets exportés', resultat.output)
+
+        resultat = runner.invoke(args=['rebuild-stats', '--jeu', str(jeu_id)])
+        self.assertEqual(resultat.exit_code, 0, resultat.output)
+        with self.app.app_context():
+            selectionner_jeu(jeu_id)
+            self.assertEqual(Statistique.query.filter_by(categorie='total_participants').one().compteur, 2)
+
+        resultat = runner.invoke(args=['rebuild-stats', '--jeu', '99'])
+        self.assertNotEqual(resultat.exit_code, 0)
+        self.assertIn('Jeu 99 introuvable', resultat.output)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+# tests/test_profilage.py
+
+import os
+import tempfile
+import time
+import unittest
+from app import create_app
+from models import db
+from config import TestConfig
+from profilage import Echantillonneur
+
+class TestProfilage(unittest.TestCase):
+
+    def setUp(self):
+        self.dossier = tempfile.TemporaryDirectory()
+        dossier = self.dossier.name
+
+        class ProfilageConfig(TestConfig):
+            PROFILAGE_JETON = 'secret'
+            PROFILAGE_INTERVALLE_MS = 1
+            PROFILAGE_DOSSIER = dossier
+
+        self.app = create_app(config_class=ProfilageConfig)
+        self.app.testing = True
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        self.dossier.cleanup()
+
+    def test_echantillonneur(self):
+        def attendre():
+            time.sleep(0.05)
+
+        echantillonneur = Echantillonneur(0.001).demarrer()
+        attendre()
+        echantillonneur.arreter()
+        self.assertGreater(echantillonneur.echantillons, 0)
+        self.assertTrue(any('attendre (test_profilage.py' in pile.split(';')[-1] for pile in echantillonneur.piles))
+
+    def test_requete_profilee_avec_le_jeton(self):
+        self.client.get('/rules')
+        self.assertEqual(os.listdir(self.dossier.name), [])
+
+        self.client.get('/rules', headers={'X-Profilage': 'mauvais'})
+        self.assertEqual(os.listdir(self.dossier.name), [])
+
+        self.client.get('/rules', headers={'X-Profilage': 'secret'})
+        profils = self.app.extensions['profileur'].plus_lents()
+        self.assertEqual(len(profils), 1)
+        self.assertEqual(profils[0]['chemin'], '/rules')
+        self.assertTrue(os.path.exists(os.path.join(self.dossier.name, profils[0]['fichier'])))
+
+    def test_page_des_profils(self):
+        self.client.get('/participants', headers={'X-Profilage': 'secret'})
+
+        self.assertEqual(self.client.get('/profils').status_code, 404)
+        response = self.client.get('/profils?jeton=secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'GET /participants', response.data)
+
+        fichier = self.app.extensions['profileur'].plus_lents()[0]['fichier']
+        response = self.client.get(f'/profils/{fichier}', headers={'X-Profilage': 'secret'})
+        self.assertEqual(response.status_code, 200)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+# tests/test_routage.py
+
+import os
+import tempfile
+import unittest
+from app import create_app
+from models import db, Participant, Tirage
+from config import TestConfig
+
+class TestRoutage(unittest.TestCase):
+
+    def setUp(self):
+        self.dossier = tempfile.TemporaryDirectory()
+        primaire = os.path.join(self.dossier.name, 'primaire.db')
+        replique = os.path.join(self.dossier.name, 'replique.db')
+
+        class ReplicaConfig(TestConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{primaire}"
+            SQLALCHEMY_BINDS = {'replica': f"sqlite:///{replique}"}
+            REPLICATION_LOCALE = True
+            # Réplication manuelle : la réplique reste en retard pendant le test
+            REPLICATION_DELAI = 3600
+            READ_YOUR_WRITES_SECONDES = 5
+
+        self.app = create_app(config_class=ReplicaConfig)
+        self.app.testing = True
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.replication = self.app.extensions['replication']
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        for engine in db.engines.values():
+            engine.dispose()
+        self.app_context.pop()
+        # db est partagé entre les applications de test : on retire la clé de
+        # bind pour que create_all/drop_all des autres tests ne la cherchent pas
+        db.metadatas.pop('replica', None)
+        self.dossier.cleanup()
+
+    def test_lecture_sur_la_replique(self):
+        db.session.add(Participant(nom='Alice', numeros=[1, 2, 3, 4, 5], etoiles=[1, 2], gain=12.0))
+        db.session.commit()
+
+        # La réplique n'a pas encore le gain d'Alice
+        response = self.client.get('/participants')
+        self.assertIn(b'Alice', response.data)
+        self.assertNotIn(b'12 \xe2\x82\xac', response.data)
+
+        self.replication.repliquer()
+        response = self.client.get('/participants')
+        self.assertIn(b'12 \xe2\x82\xac', response.data)
+
+    def test_lire_ses_propres_ecritures(self):
+        self.replication.repliquer()
+        self.client.post('/inscription', data={
+            'nom': 'Bob',
+            'numeros': ['1', '2', '3', '4', '5'],
+            'etoiles': ['1', '2']
+        })
+        db.session.execute(db.update(Participant).values(gain=7.0))
+        db.session.commit()
+
+        # Juste après son POST, le client lit sur la base principale
+        response = self.client.get('/participants')
+        self.assertIn(b'7 \xe2\x82\xac', response.data)
+
+        # Un autre client lit la réplique, en retard
+        response = self.app.test_client().get('/participants')
+        self.assertNotIn(b'7 \xe2\x82\xac', response.data)
+
+    def test_resultats_enregistres_lus_sur_la_replique(self):
+        db.session.add(Participant(nom='Alice', numeros=[1, 2, 3, 4, 5], etoiles=[1, 2]))
+        db.session.add(Tirage(numeros=[1, 2, 3, 4, 5], etoiles=[1, 2]))
+        db.session.commit()
+
+        # Premier affichage : calcul et enregistrement sur la principale
+        response = self.client.get('/resultats')
+        self.assertIn(b'3000000 \xe2\x82\xac', response.data)
+        tirage = db.session.get(Tirage, 1)
+        self.assertEqual(tirage.regle_nb, 1)
+
+        self.replication.repliquer()
+        response = self.client.get('/resultats')
+        self.assertIn(b'Alice', response.data)
+        self.assertIn(b'3000000 \xe2\x82\xac', response.data)
@@ -0,0 +1,80 @@
+# tests/test_snapshot.py
+
+import csv
+import os
+import tempfile
+import unittest
+from app import create_app
+from models import db, Participant, Tirage
+from config import TestConfig
+from snapshot import Snapshot, SnapshotError, regler_snapshot
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app(config_class=TestConfig)
+        self.app.testing = True
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.dossier = tempfile.TemporaryDirectory()
+        self.chemin = os.path.join(self.dossier.name, 'tickets.snap')
+
+        db.session.add(Participant(nom='Alice', numeros=[1, 2, 3, 4, 5], etoiles=[1, 2]))
+        db.session.add(Participant(nom='Bob', numeros=[1, 2, 3, 10, 11], etoiles=[1, 9]))
+        db.session.add(Participant(nom='Carla', numeros=[20, 21, 22, 23, 24], etoiles=[5, 6]))
+        db.session.add(Tirage(numeros=[1, 2, 3, 4, 5], etoiles=[1, 2]))
+        db.session.commit()
+
+    def tearDown(self):
+        self.dossier.cleanup()
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def lire_csv(self):
+        with open(self.chemin + '.csv', newline='') as fichier:
+            return list(csv.DictReader(fichier))
+
+    def test_export_et_lecture(self):
+        resultat = self.app.test_cli_runner().invoke(args=['export-snapshot', self.chemin])
+        self.assertEqual(resultat.exit_code, 0, resultat.output)
+
+        with Snapshot(self.chemin) as snapshot:
+            self.assertEqual(len(snapshot), 3)
+            self.assertEqual(list(snapshot.numeros_de(1)), [1, 2, 3, 10, 11])
+            self.assertEqual(list(snapshot.etoiles_de(2)), [5, 6])
+            self.assertEqual(snapshot.meta['tirage']['numeros'], [1, 2, 3, 4, 5])
+
+            scores, ordre, gains = regler_snapshot(snapshot, [1, 2, 3, 4, 5], [1, 2],
+                                                   snapshot.meta['bareme'], snapshot.meta['jackpot'])
+            self.assertEqual(scores[0], (5, 2, 0, 0))
+            self.assertEqual(ordre[0], 0)
+            self.assertAlmostEqual(sum(gains), 3000000)
+
+    def test_reglement_identique_a_resultats(self):
+        self.app.test_cli_runner().invoke(args=['export-snapshot', self.chemin])
+        resultat = self.app.test_cli_runner().invoke(args=['settle-snapshot', self.chemin, '--sortie', self.chemin + '.csv'])
+        self.assertEqual(resultat.exit_code, 0, resultat.output)
+        lignes = self.lire_csv()
+
+        self.client.get('/resultats')
+        for ligne in lignes:
+            participant = db.session.get(Participant, int(ligne['id']))
+            self.assertAlmostEqual(float(ligne['gain']), participant.gain, places=2)
+
+    def test_rejouer_un_autre_tirage(self):
+        self.app.test_cli_runner().invoke(args=['export-snapshot', self.chemin])
+        db.session.add(Tirage(numeros=[20, 21, 22, 23, 24], etoiles=[5, 6]))
+        db.session.commit()
+        self.app.test_cli_runner().invoke(args=['settle-snapshot', self.chemin, '--tirage', '2', '--sortie', self.chemin + '.csv'])
+        lignes = self.lire_csv()
+        self.assertEqual(lignes[0]['id'], '3')
+        self.assertEqual(lignes[0]['rang'], '1')
+
+    def test_fichier_invalide(self):
+        with open(self.chemin, 'wb') as fichier:
+            fichier.write(b'pas un snapshot du tout, vraiment pas')
+        with self.assertRaises(SnapshotError):
+            Snapshot(self.chemin)
@@ -0,0 +1,110 @@
+# tests/test_statistiques.py
+
+import unittest
+from sqlalchemy import event
+from app import create_app
+from models import db, Participant, Settings, Statistique, Tirage
+from config import TestConfig
+from statistiques import lire_statistiques
+
+class TestStatistiques(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app(config_class=TestConfig)
+        self.app.testing = True
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+        db.session.add(Participant(nom='Alice', numeros=[1, 2, 3, 4, 5], etoiles=[1, 2]))
+        db.session.add(Participant(nom='Bob', numeros=[1, 7, 8, 9, 10], etoiles=[1, 3]))
+        db.session.add(Tirage(numeros=[1, 2, 3, 4, 5], etoiles=[1, 2]))
+        db.session.add(Tirage(numeros=[1, 20, 21, 22, 23], etoiles=[4, 5]))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def stats(self):
+        return lire_statistiques(Settings.query.first())
+
+    def test_compteurs_incrementaux(self):
+        stats = self.stats()
+        self.assertEqual(stats['tirages'], 2)
+        self.assertEqual(stats['participants'], 2)
+        self.assertEqual(stats['numeros'][0], {'valeur': 1, 'tirages': 2, 'choix': 2, 'ecart': 0})
+        self.assertEqual(stats['numeros'][1], {'valeur': 2, 'tirages': 1, 'choix': 1, 'ecart': 1})
+        self.assertIsNone(stats['numeros'][48]['ecart'])
+        self.assertEqual(stats['etoiles'][0]['choix'], 2)
+        self.assertEqual(stats['numeros_populaires'][0], 1)
+
+    def test_suppressions(self):
+        db.session.delete(Participant.query.filter_by(nom='Bob').first())
+        db.session.delete(Tirage.query.order_by(Tirage.id.desc()).first())
+        db.session.commit()
+
+        stats = self.stats()
+        self.assertEqual(stats['participants'], 1)
+        self.assertEqual(stats['tirages'], 1)
+        self.assertEqual(stats['numeros'][0], {'valeur': 1, 'tirages': 1, 'choix': 1, 'ecart': 0})
+        self.assertEqual(stats['numeros'][19]['tirages'], 0)
+        self.assertIsNone(stats['numeros'][19]['ecart'])
+
+    def test_ecart_apres_suppression_d_un_tirage(self):
+        db.session.add(Tirage(numeros=[30, 31, 32, 33, 34], etoiles=[6, 7]))
+        db.session.commit()
+        db.session.delete(Tirage.query.filter(Tirage.numeros == [1, 20, 21, 22, 23]).first())
+        db.session.commit()
+
+        # Un seul tirage a eu lieu depuis la sortie du 2, malgré le trou dans les ids
+        stats = self.stats()
+        self.assertEqual(stats['numeros'][1]['ecart'], 1)
+        self.assertEqual(stats['numeros'][0]['ecart'], 1)
+        self.assertEqual(stats['numeros'][29]['ecart'], 0)
+
+    def test_une_requete_par_categorie(self):
+        requetes = []
+
+        def compter(conn, cursor, statement, parameters, context, executemany):
+            if 'statistique' in statement:
+                requetes.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', compter)
+        try:
+            for i in range(50):
+                db.session.add(Participant(nom=f'P{i}', numeros=[i % 49 + 1, 45, 46, 47, 48], etoiles=[1, 2]))
+            db.session.commit()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', compter)
+
+        # Lecture des compteurs existants, puis au plus deux requêtes par catégorie
+        self.assertLessEqual(len(requetes), 1 + 2 * 3)
+        stats = self.stats()
+        self.assertEqual(stats['participants'], 52)
+        self.assertEqual(stats['numeros'][44]['choix'], 50)
+
+    def test_suppression_de_tous_les_participants(self):
+        self.client.post('/supprimer_participants')
+        stats = self.stats()
+        self.assertEqual(stats['participants'], 0)
+        self.assertEqual(stats['numeros'][0]['choix'], 0)
+        self.assertEqual(stats['numeros'][0]['tirages'], 2)
+
+    def test_reconstruction(self):
+        attendu = self.stats()
+        db.session.query(Statistique).delete()
+        db.session.commit()
+        self.assertEqual(self.stats()['tirages'], 0)
+
+        resultat = self.app.test_cli_runner().invoke(args=['rebuild-stats'])
+        self.assertEqual(resultat.exit_code, 0, resultat.output)
+        self.assertEqual(self.stats(), attendu)
+
+    def test_routes(self):
+        response = self.client.get('/stats')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Statistiques des Tirages', response.data)
+        self.assertEqual(self.client.get('/api/stats').get_json()['tirages'], 2)
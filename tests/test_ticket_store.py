@@ -0,0 +1,126 @@
+# tests/test_ticket_store.py
+
+import unittest
+from app import create_app
+from models import db, Participant, Tirage
+from config import TestConfig
+from ticket_store import TicketStore
+
+class TestTicketStore(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app(config_class=TestConfig)
+        self.app.testing = True
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def ajouter(self, nom, numeros, etoiles):
+        db.session.add(Participant(nom=nom, numeros=numeros, etoiles=etoiles))
+        db.session.commit()
+
+    def test_refresh_incremental(self):
+        store = TicketStore()
+        self.ajouter('A', [1, 2, 3, 4, 5], [1, 2])
+        store.refresh()
+        self.assertEqual(len(store), 1)
+
+        self.ajouter('B', [6, 7, 8, 9, 10], [3, 4])
+        store.refresh()
+        self.assertEqual(store.noms, ['A', 'B'])
+        self.assertEqual(store.numeros_de(1).tolist(), [6, 7, 8, 9, 10])
+        self.assertEqual(store.etoiles_de(1).tolist(), [3, 4])
+        self.assertEqual(store.watermark, store.ids[-1])
+
+    def test_refresh_apres_suppression(self):
+        store = TicketStore()
+        self.ajouter('A', [1, 2, 3, 4, 5], [1, 2])
+        self.ajouter('B', [6, 7, 8, 9, 10], [3, 4])
+        store.refresh()
+
+        Participant.query.filter_by(nom='A').delete()
+        db.session.commit()
+        self.ajouter('C', [11, 12, 13, 14, 15], [5, 6])
+        store.refresh()
+        self.assertEqual(store.noms, ['B', 'C'])
+        self.assertEqual(store.numeros_de(0).tolist(), [6, 7, 8, 9, 10])
+
+    def test_refresh_apres_remplacement_de_tous_les_tickets(self):
+        store = TicketStore()
+        self.ajouter('A', [1, 2, 3, 4, 5], [1, 2])
+        self.ajouter('B', [6, 7, 8, 9, 10], [3, 4])
+        store.refresh()
+
+        # Autant de tickets qu'avant : seuls des ids jamais réutilisés
+        # permettent de voir que ce ne sont plus les mêmes
+        Participant.query.delete()
+        db.session.commit()
+        self.ajouter('C', [11, 12, 13, 14, 15], [5, 6])
+        self.ajouter('D', [16, 17, 18, 19, 20], [7, 8])
+        store.refresh()
+        self.assertEqual(store.noms, ['C', 'D'])
+        self.assertEqual(store.numeros_de(0).tolist(), [11, 12, 13, 14, 15])
+
+    def test_instantane_independant_du_magasin(self):
+        store = TicketStore()
+        self.ajouter('A', [1, 2, 3, 4, 5], [1, 2])
+        store.refresh()
+        copie = store.instantane()
+
+        # Rechargement concurrent : la copie et ses marqueurs ne bougent pas,
+        # et ce qui a été calculé dessus n'est plus installé dans le magasin
+        store.clear()
+        store.append(7, 'Z', [6, 7, 8, 9, 10], [3, 4])
+        self.assertEqual(copie.noms, ['A'])
+        self.assertEqual(copie.watermark, copie.ids[0])
+        self.assertEqual(copie.numeros_de(0).tolist(), [1, 2, 3, 4, 5])
+        self.assertFalse(store.adopter(copie, 'index', {'resultats': 'vue'}))
+        self.assertIsNone(store.index_classement)
+        self.assertTrue(store.adopter(store.instantane(), 'index', {}))
+
+    def test_premiers_score_hors_du_verrou(self):
+        store = TicketStore()
+        self.ajouter('A', [1, 2, 3, 4, 5], [1, 2])
+        self.ajouter('B', [1, 2, 3, 40, 41], [1, 9])
+        store.refresh()
+        tirage = Tirage(id=1, numeros=[1, 2, 3, 4, 5], etoiles=[1, 2])
+
+        # Le magasin reste disponible (refresh, rang_courant) pendant que les
+        # tickets sont scorés, à la construction comme au complément de l'index
+        verrous = []
+        scores = TicketStore.scores
+        def scores_espion(copie, *args, **kwargs):
+            verrous.append(store._lock.locked())
+            return scores(copie, *args, **kwargs)
+        TicketStore.scores = scores_espion
+        try:
+            premiers, taille, _ = store.premiers(tirage, 1)
+            self.ajouter('C', [6, 7, 8, 9, 10], [3, 4])
+            store.refresh()
+            premiers, taille, _ = store.premiers(tirage, 1)
+        finally:
+            TicketStore.scores = scores
+        self.assertEqual(verrous, [False, False])
+        self.assertEqual(taille, 3)
+        self.assertEqual([(ticket.nom, rang) for ticket, rang, _ in premiers], [('A', 1)])
+        self.assertIs(store.index_classement, store.index_pour(tirage, 1))
+
+    def test_resultats_depuis_store(self):
+        self.ajouter('Perdant', [10, 11, 12, 13, 14], [8, 9])
+        self.ajouter('Gagnant', [1, 2, 3, 4, 5], [1, 2])
+        db.session.add(Tirage(numeros=[1, 2, 3, 4, 5], etoiles=[1, 2]))
+        db.session.commit()
+
+        response = self.client.get('/resultats')
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(response.data.index(b'Gagnant'), response.data.index(b'Perdant'))
+
+        gagnant = Participant.query.filter_by(nom='Gagnant').first()
+        self.assertEqual(gagnant.match_numeros, 5)
+        self.assertAlmostEqual(gagnant.gain, 3000000 * 40 / 60)
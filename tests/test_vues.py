@@ -0,0 +1,91 @@
+# tests/test_vues.py
+
+import os
+import tempfile
+import unittest
+from app import create_app
+from models import db, Participant, Tirage
+from config import TestConfig
+from ticket_store import get_ticket_store
+from vues import formater_montant, lignes_resultats
+
+class TestVues(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app(config_class=TestConfig)
+        self.app.testing = True
+        self.client = self.app.test_client()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_formater_montant(self):
+        self.assertEqual(formater_montant(1200.0), "1200 €")
+        self.assertEqual(formater_montant(12.345), "12.35 €")
+        self.assertEqual(formater_montant(None), "0 €")
+        self.assertEqual(formater_montant(7, symbole=''), "7")
+
+    def test_lignes_resultats(self):
+        participant = Participant(nom='Alice', numeros=[1, 2, 30], etoiles=[1, 5], gain=150.5,
+                                  match_numeros=2, match_etoiles=1)
+        ligne, = lignes_resultats([participant], Tirage(numeros=[1, 2, 3], etoiles=[1, 2]))
+        self.assertEqual(ligne.numeros, '<span class="correct-number">1</span>, '
+                                        '<span class="correct-number">2</span>, <span>30</span>')
+        self.assertEqual(ligne.etoiles, '<span class="correct-star">1</span>, <span>5</span>')
+        self.assertEqual(ligne.gain, "150.50 €")
+
+    def test_resultats_depuis_les_lignes_preparees(self):
+        db.session.add(Participant(nom='Alice', numeros=[1, 2, 3, 4, 5], etoiles=[1, 2]))
+        db.session.add(Tirage(numeros=[1, 2, 3, 4, 5], etoiles=[1, 2]))
+        db.session.commit()
+
+        premiere = self.client.get('/resultats')
+        self.assertIn(b'class="correct-number"', premiere.data)
+        self.assertIn('3000000 €'.encode(), premiere.data)
+        lignes = get_ticket_store().vues['resultats'][1]
+
+        # Page déjà réglée : mêmes lignes, sans relecture des participants
+        seconde = self.client.get('/resultats')
+        self.assertEqual(premiere.data, seconde.data)
+        self.assertIs(get_ticket_store().vues['resultats'][1], lignes)
+
+    def test_tableau_de_l_inscription_mis_a_jour(self):
+        db.session.add(Participant(nom='Alice', numeros=[1, 2, 3, 4, 5], etoiles=[1, 2]))
+        db.session.commit()
+        self.assertIn(b'Alice', self.client.get('/inscription').data)
+
+        db.session.add(Participant(nom='Bob', numeros=[6, 7, 8, 9, 10], etoiles=[3, 4]))
+        db.session.add(Tirage(numeros=[1, 2, 3, 4, 5], etoiles=[1, 2]))
+        db.session.commit()
+        response = self.client.get('/inscription')
+        self.assertIn(b'Bob', response.data)
+        self.assertNotIn('2000000 €'.encode(), response.data)
+
+        # Après le règlement, les gains apparaissent dans le tableau
+        self.client.get('/resultats')
+        self.assertIn('2000000 €'.encode(), self.client.get('/inscription').data)
+
+
+class TestCacheTemplates(unittest.TestCase):
+
+    def test_compile_templates(self):
+        with tempfile.TemporaryDirectory() as dossier:
+            class CacheConfig(TestConfig):
+                JINJA_CACHE_DOSSIER = dossier
+
+            app = create_app(config_class=CacheConfig)
+            with app.app_context():
+                db.create_all()
+                resultat = app.test_cli_runner().invoke(args=['compile-templates'])
+                self.assertEqual(resultat.exit_code, 0, resultat.output)
+                self.assertEqual(len(os.listdir(dossier)), len(app.jinja_env.list_templates(extensions=['html'])))
+                db.session.remove()
+                db.drop_all()
+
+if __name__ == '__main__':
+    unittest.main()
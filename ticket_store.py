@@ -0,0 +1,247 @@
+# ticket_store.py
+
+from array import array
+from collections import Counter
+from threading import Lock
+
+from sqlalchemy import func, select
+
+from models import db, Participant
+from jeux import etat_du_jeu, moteur_courant
+from classement import IndexClassement, scorer
+
+
+# Ligne légère exposée aux templates à la place de l'objet ORM
+class Ticket:
+    __slots__ = ('id', 'nom', 'numeros', 'etoiles', 'gain',
+                 'match_numeros', 'match_etoiles', 'numbers_proximity', 'stars_proximity')
+
+    def __init__(self, id, nom, numeros, etoiles, gain=0.0,
+                 match_numeros=0, match_etoiles=0, numbers_proximity=0, stars_proximity=0):
+        self.id = id
+        self.nom = nom
+        self.numeros = numeros
+        self.etoiles = etoiles
+        self.gain = gain
+        self.match_numeros = match_numeros
+        self.match_etoiles = match_etoiles
+        self.numbers_proximity = numbers_proximity
+        self.stars_proximity = stars_proximity
+
+
+# Magasin de tickets en mémoire, partagé par toutes les requêtes d'un processus.
+# Les numéros et étoiles de tous les tickets sont stockés à plat dans des
+# tableaux compacts ; les offsets délimitent les tickets. Les tickets ne
+# changent jamais après l'inscription : on ne recharge donc que les lignes dont
+# l'id dépasse le dernier id chargé (watermark), sauf si des suppressions ont eu lieu.
+# Les ids ne sont jamais réutilisés (AUTOINCREMENT, voir models.py) : des
+# tickets supprimés puis remplacés par autant d'autres changent forcément le
+# plus grand id, et ne peuvent pas passer pour les anciens.
+class TicketStore:
+    def __init__(self):
+        self._lock = Lock()
+        # Incrémentée à chaque vidage : deux états de même génération ne
+        # diffèrent que par des tickets ajoutés à la fin
+        self.generation = 0
+        self.clear()
+
+    def clear(self):
+        self.generation += 1
+        self.ids = array('q')
+        self.noms = []
+        self.numeros = array('H')
+        self.etoiles = array('H')
+        self.numeros_offsets = array('I', [0])
+        self.etoiles_offsets = array('I', [0])
+        self.watermark = 0
+        self.index_classement = None
+        # Modèles de vue et fragments rendus (vues.py), par nom : (clé, valeur)
+        self.vues = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def append(self, id, nom, numeros, etoiles):
+        self.ids.append(id)
+        self.noms.append(nom)
+        self.numeros.extend(numeros or [])
+        self.etoiles.extend(etoiles or [])
+        self.numeros_offsets.append(len(self.numeros))
+        self.etoiles_offsets.append(len(self.etoiles))
+        self.watermark = max(self.watermark, id)
+
+    def numeros_de(self, i):
+        return self.numeros[self.numeros_offsets[i]:self.numeros_offsets[i + 1]]
+
+    def etoiles_de(self, i):
+        return self.etoiles[self.etoiles_offsets[i]:self.etoiles_offsets[i + 1]]
+
+    def ticket(self, i, gain=0.0, score=(0, 0, 0, 0)):
+        return Ticket(self.ids[i], self.noms[i], self.numeros_de(i).tolist(), self.etoiles_de(i).tolist(), gain, *score)
+
+    def scores(self, tirage, debut=0):
+        numeros_tirage = list(tirage.numeros)
+        etoiles_tirage = list(tirage.etoiles)
+        return [
+            scorer(self.numeros_de(i), self.etoiles_de(i), numeros_tirage, etoiles_tirage)
+            for i in range(debut, len(self.ids))
+        ]
+
+    # Index de rang pour le tirage donné : reconstruit si le tirage a changé,
+    # si des tickets ont été supprimés (clear) ou s'il suit moins de
+    # nb_premiers tickets, sinon complété des seuls nouveaux tickets.
+    # Les tickets sont scorés sur un instantané, hors du verrou : un refresh
+    # n'attend jamais le calcul, seulement l'installation de son résultat
+    def index_pour(self, tirage, nb_premiers=0):
+        return self._index_pour(tirage, nb_premiers)[0]
+
+    # (index, instantané) : l'index est soit celui du magasin, soit un index
+    # privé construit sur l'instantané si le magasin a été vidé entre-temps
+    def _index_pour(self, tirage, nb_premiers):
+        with self._lock:
+            index = self.index_classement
+            a_jour = (index is not None and index.tirage_id == tirage.id
+                      and index.nb_premiers >= nb_premiers)
+            if a_jour and index.taille == len(self.ids):
+                return index, None
+        copie = self.instantane()
+
+        if a_jour and index.taille < len(copie.ids):
+            taille = index.taille
+            scores = copie.scores(tirage, debut=taille)
+            with self._lock:
+                # Personne ne l'a remplacé ni complété pendant le calcul
+                if self.index_classement is index and index.taille == taille:
+                    index.ajouter(scores)
+                    return index, copie
+
+        suivis = max(nb_premiers, index.nb_premiers if index is not None else 0)
+        index = IndexClassement(tirage.id, copie.scores(tirage), nb_premiers=suivis)
+        self.adopter(copie, index, {})
+        return index, copie
+
+    # Rang, nombre d'ex aequo et taille du pool d'un score d'après l'index
+    # courant, sans jamais le construire ni le compléter (ce qui reviendrait
+    # à scorer des tickets dans la requête) : None si l'index ne couvre pas
+    # encore tous les tickets du magasin pour ce tirage
+    def rang_courant(self, tirage, score):
+        with self._lock:
+            index = self.index_classement
+            if index is None or index.tirage_id != tirage.id or index.taille != len(self.ids):
+                return None
+            return index.rang(score), index.ex_aequo(score), index.taille, index.regle
+
+    # Les n premiers tickets du classement du tirage, tickets récents compris,
+    # avec leur rang et leur nombre d'ex aequo, la taille du pool et l'effectif
+    # de chaque classe : de quoi calculer leurs gains (bareme.Repartition).
+    # Seule la lecture de ces n lignes se fait sous le verrou.
+    def premiers(self, tirage, n):
+        while True:
+            index, copie = self._index_pour(tirage, n)
+            with self._lock:
+                # Un index installé désigne des positions du magasin, un index
+                # privé des positions de l'instantané sur lequel il a été
+                # construit ; un index remplacé depuis sans instantané : à refaire
+                if self.index_classement is index:
+                    source = self
+                elif copie is not None:
+                    source = copie
+                else:
+                    continue
+                premiers = [
+                    (source.ticket(position, 0.0, score), rang, ex_aequo)
+                    for position, score, rang, ex_aequo in index.classement_premiers()[:n]
+                ]
+                return premiers, index.taille, Counter(index.effectifs)
+
+    # Valeur mémorisée sous ce nom si sa clé n'a pas changé, sinon recalculée
+    def vue(self, nom, cle, fabrique):
+        courante = self.vues.get(nom)
+        if courante is None or courante[0] != cle:
+            courante = (cle, fabrique())
+            self.vues[nom] = courante
+        return courante[1]
+
+    # Copie figée des tickets, prise sous le verrou : un refresh ou un clear
+    # concurrent (workers à threads) ne peut pas la modifier en cours de calcul
+    def instantane(self):
+        copie = TicketStore()
+        with self._lock:
+            copie.ids = array('q', self.ids)
+            copie.noms = list(self.noms)
+            copie.numeros = array('H', self.numeros)
+            copie.etoiles = array('H', self.etoiles)
+            copie.numeros_offsets = array('I', self.numeros_offsets)
+            copie.etoiles_offsets = array('I', self.etoiles_offsets)
+            copie.watermark = self.watermark
+            copie.generation = self.generation
+        return copie
+
+    # Installe l'index et les vues calculés sur un instantané, sauf si le
+    # magasin a été vidé depuis : les positions de l'index ne vaudraient plus
+    def adopter(self, instantane, index, vues):
+        with self._lock:
+            if self.generation != instantane.generation:
+                return False
+            self.index_classement = index
+            self.vues.update(vues)
+            return True
+
+    def tickets(self, gains=None):
+        gains = gains or {}
+        return [self.ticket(i, gains.get(self.ids[i], 0.0)) for i in range(len(self.ids))]
+
+    def _charger(self, apres_id):
+        lignes = db.session.execute(
+            select(Participant.id, Participant.nom, Participant.numeros, Participant.etoiles)
+            .where(Participant.id > apres_id)
+            .order_by(Participant.id),
+            bind_arguments={'bind': moteur_courant()}
+        )
+        for id, nom, numeros, etoiles in lignes:
+            self.append(id, nom, numeros, etoiles)
+
+    # Met le magasin à jour à partir de la base : chargement incrémental des
+    # nouveaux tickets, rechargement complet si des tickets ont disparu
+    def refresh(self):
+        with self._lock:
+            # Toujours sur la base principale (ou le shard du jeu) : une réplique en retard ferait
+            # croire à des suppressions et forcerait des rechargements complets
+            # Deux requêtes séparées : ensemble, SQLite parcourt tout l'index
+            # pour les deux agrégats, alors que max(id) seul est une simple
+            # lecture de la fin de la clé primaire et count(*) le comptage
+            # le plus rapide qu'il sache faire
+            moteur = moteur_courant()
+            nombre = db.session.execute(
+                select(func.count()).select_from(Participant), bind_arguments={'bind': moteur}
+            ).scalar()
+            max_id = db.session.execute(
+                select(func.max(Participant.id)), bind_arguments={'bind': moteur}
+            ).scalar() or 0
+
+            if nombre == len(self.ids) and max_id == self.watermark:
+                return self
+
+            if nombre < len(self.ids) or max_id < self.watermark:
+                self.clear()
+
+            self._charger(self.watermark)
+
+            if len(self.ids) != nombre:
+                self.clear()
+                self._charger(0)
+
+        return self
+
+
+# Gains courants (colonne mutable) sans recharger les tickets picklés
+def charger_gains():
+    return dict(db.session.execute(select(Participant.id, Participant.gain)).all())
+
+
+def init_ticket_store(app):
+    app.extensions['ticket_store'] = TicketStore()
+
+
+def get_ticket_store():
+    return etat_du_jeu('ticket_store', lambda jeu_id: TicketStore()).refresh()
@@ -0,0 +1,69 @@
+# vues.py
+
+# Modèles de vue des pages chaudes. Les lignes du classement sont préparées
+# une fois, au règlement, puis réutilisées tant que le règlement est valable :
+# le template n'a plus qu'à les recopier, sans boucle sur les numéros, test
+# d'appartenance au tirage ni filtre de formatage par cellule.
+
+from pathlib import Path
+
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup, escape
+
+
+def formater_montant(valeur, symbole=' €'):
+    valeur = float(valeur or 0)
+    return f"{int(valeur)}{symbole}" if valeur.is_integer() else f"{valeur:.2f}{symbole}"
+
+
+def cellule(valeurs, tirees, classe):
+    return Markup(', '.join(
+        f'<span class="{classe}">{escape(v)}</span>' if v in tirees else f'<span>{escape(v)}</span>'
+        for v in valeurs or []
+    ))
+
+
+class LigneResultat:
+    __slots__ = ('nom', 'numeros', 'etoiles', 'match_numeros', 'match_etoiles',
+                 'numbers_proximity', 'stars_proximity', 'gain')
+
+    def __init__(self, participant, numeros_tirage, etoiles_tirage):
+        self.nom = participant.nom
+        # Cellules déjà mises en forme, numéros gagnants surlignés
+        self.numeros = cellule(participant.numeros, numeros_tirage, 'correct-number')
+        self.etoiles = cellule(participant.etoiles, etoiles_tirage, 'correct-star')
+        self.match_numeros = participant.match_numeros
+        self.match_etoiles = participant.match_etoiles
+        self.numbers_proximity = participant.numbers_proximity
+        self.stars_proximity = participant.stars_proximity
+        self.gain = formater_montant(participant.gain)
+
+
+def lignes_resultats(participants, tirage):
+    numeros_tirage = frozenset(tirage.numeros)
+    etoiles_tirage = frozenset(tirage.etoiles)
+    return [LigneResultat(p, numeros_tirage, etoiles_tirage) for p in participants]
+
+
+# Clé de validité des lignes du classement : elles changent avec le tirage,
+# son règlement et les réglages qui entrent dans le calcul des gains
+def cle_resultats(tirage, settings):
+    return (tirage.id, tirage.regle_nb, tirage.regle_max_id, settings.jackpot_amount, settings.max_gagnants)
+
+
+# Clé de validité du tableau des participants de l'inscription : les tickets
+# du magasin et le dernier règlement (les gains affichés)
+def cle_participants(store, tirage, settings):
+    if tirage is None:
+        return (len(store), store.watermark)
+    return (len(store), store.watermark) + cle_resultats(tirage, settings)
+
+
+# Cache disque du bytecode des templates (JINJA_CACHE_DOSSIER) : un worker
+# qui démarre charge les templates déjà compilés au lieu de les reparser.
+# Doit être appelé avant le premier accès à app.jinja_env.
+def init_rendu(app):
+    dossier = app.config.get('JINJA_CACHE_DOSSIER')
+    if dossier:
+        Path(dossier).mkdir(parents=True, exist_ok=True)
+        app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(dossier)}